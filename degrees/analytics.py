@@ -0,0 +1,75 @@
+import sys
+
+import degrees
+
+# Number of largest connected components listed
+TOP_COMPONENTS = 5
+
+
+def main():
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python analytics.py [directory] [name]")
+    directory = sys.argv[1] if len(sys.argv) >= 2 else "large"
+
+    # Load data from files into memory
+    print("Loading data...")
+    degrees.load_data(directory)
+    print("Data loaded.")
+
+    # Distances from one person to everyone else ("Bacon numbers")
+    if len(sys.argv) == 3:
+        source = degrees.person_id_for_name(sys.argv[2])
+        if source is None:
+            sys.exit("Person not found.")
+        print_distances(source)
+
+    print_components()
+
+
+def distance_table(person_id):
+    """
+    Returns a list of (distance, count, cumulative count) rows, one per
+    degree of separation from the given person, up to its eccentricity.
+    """
+    counts = degrees.graph.level_counts(degrees.graph.person_index[person_id])
+    table = []
+    total = 0
+    for distance, count in enumerate(counts):
+        total += count
+        table.append((distance, count, total))
+    return table
+
+
+def print_distances(person_id):
+    """
+    Prints the distribution of shortest-path lengths from a person
+    to everyone connected to them, and their eccentricity.
+    """
+    name = degrees.people[person_id]["name"]
+    table = distance_table(person_id)
+    unreachable = len(degrees.people) - table[-1][2]
+
+    print(f"Degrees of separation from {name}:")
+    print(f"  {'degrees':>7}  {'people':>10}  {'cumulative':>10}")
+    for distance, count, total in table:
+        print(f"  {distance:>7}  {count:>10}  {total:>10}")
+    print(f"Eccentricity: {len(table) - 1}")
+    print(f"Not connected: {unreachable}")
+
+
+def print_components():
+    """
+    Prints the number of connected components and the largest ones.
+    """
+    graph = degrees.graph
+    components = graph.components()
+    isolated = sum(1 for size, _ in components if size == 1)
+
+    print(f"Connected components: {len(components)} ({isolated} isolated people)")
+    for size, p in components[:TOP_COMPONENTS]:
+        name = degrees.people[graph.person_ids[p]]["name"]
+        print(f"  {size} people, including {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+import csv
+import multiprocessing
+import os
+import sys
+
+import degrees
+from graph import SearchTreeCache
+
+# Number of completed search trees kept in memory between sources
+CACHE_SIZE = 16
+
+# Search trees shared by every call of answer_queries (see shared_cache)
+tree_cache = None
+
+# Search trees kept by each worker process (see init_worker)
+WORKER_CACHE_SIZE = 0
+
+# Per-worker cache of search trees (see answer_queries_parallel)
+worker_cache = None
+
+
+def main():
+    # Optional "-j workers" to answer queries over a process pool
+    args = sys.argv[1:]
+    workers = 1
+    if args[:1] == ["-j"] and len(args) >= 2 and args[1].isdigit():
+        workers = int(args[1]) or os.cpu_count()
+        args = args[2:]
+    if len(args) > 2 or any(arg.startswith("-") and arg != "-" for arg in args):
+        sys.exit("Usage: python batch.py [-j workers] [directory] [queries.csv]")
+    directory = args[0] if len(args) >= 1 else "large"
+    filename = args[1] if len(args) == 2 else "-"
+
+    # Load data from files into memory
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(directory)
+    print("Data loaded.", file=sys.stderr)
+
+    # Each query is one "source name,target name" row
+    if filename == "-":
+        queries = read_queries(sys.stdin)
+    else:
+        with open(filename, encoding="utf-8") as f:
+            queries = read_queries(f)
+
+    writer = csv.writer(sys.stdout)
+    writer.writerow(["source", "target", "status", "degrees", "path"])
+
+    # Parallel results stream back in completion order, not input order
+    if workers > 1:
+        answers = answer_queries_parallel(queries, workers)
+    else:
+        answers = enumerate(answer_queries(queries))
+
+    for i, (status, path) in answers:
+        source_name, target_name = queries[i]
+        writer.writerow([
+            source_name, target_name, status,
+            "" if path is None else len(path),
+            "" if path is None else describe(path)
+        ])
+
+
+def read_queries(f):
+    """
+    Read (source name, target name) pairs from CSV file `f`,
+    skipping blank lines.
+    """
+    return [
+        (row[0].strip(), row[1].strip())
+        for row in csv.reader(f)
+        if len(row) >= 2
+    ]
+
+
+def answer_queries(queries, cache=None):
+    """
+    Answer a list of (source name, target name) queries.
+
+    Return a list of (status, path) pairs in the same order as `queries`,
+    where `path` is a list of (movie_id, person_id) pairs, or None when
+    status is not "ok".
+
+    Queries are grouped by source so that a single Breadth-First Search
+    tree answers every target of that source. Trees are kept in `cache`
+    (an LRU SearchTreeCache, by default shared across calls), where
+    they also answer later queries to their source (see answer_group).
+    """
+    if cache is None:
+        cache = shared_cache()
+    results, groups = group_queries(queries)
+
+    for source, targets in largest_first(groups):
+        for i, answer in answer_group(cache, source, targets):
+            results[i] = answer
+
+    return results
+
+
+def answer_queries_parallel(queries, workers):
+    """
+    Answer a list of (source name, target name) queries over a pool of
+    `workers` processes, yielding (index, (status, path)) pairs as soon
+    as each source group completes: answers come in completion order,
+    not in the order of `queries`.
+
+    Workers are forked after the data is loaded, so they share the graph
+    with this process instead of receiving a pickled copy per task.
+    """
+    results, groups = group_queries(queries)
+
+    # Queries that failed name resolution are answered right away
+    for i, answer in enumerate(results):
+        if answer is not None:
+            yield i, answer
+
+    # Without fork the graph would be re-pickled for every worker
+    if "fork" not in multiprocessing.get_all_start_methods():
+        cache = shared_cache()
+        for source, targets in largest_first(groups):
+            yield from answer_group(cache, source, targets)
+        return
+
+    context = multiprocessing.get_context("fork")
+    with context.Pool(workers, initializer=init_worker) as pool:
+        for answers in pool.imap_unordered(answer_task, groups.items()):
+            yield from answers
+
+
+def shared_cache():
+    """
+    Return the cache of search trees shared across calls of
+    answer_queries, for the graph currently loaded.
+    """
+    global tree_cache
+    if tree_cache is None or tree_cache.graph is not degrees.graph:
+        tree_cache = SearchTreeCache(degrees.graph, CACHE_SIZE)
+    return tree_cache
+
+
+def init_worker():
+    """
+    Give each worker process its own cache of search trees.
+
+    Each source has a single group, and groups land on workers in no
+    particular order, so a worker's trees would rarely be used again:
+    workers keep WORKER_CACHE_SIZE of them (none), not CACHE_SIZE
+    arrays over every person each.
+    """
+    global worker_cache
+    worker_cache = SearchTreeCache(degrees.graph, WORKER_CACHE_SIZE)
+
+
+def answer_task(group):
+    """
+    Answer one (source, targets) group inside a worker process.
+    """
+    source, targets = group
+    return answer_group(worker_cache, source, targets)
+
+
+def group_queries(queries):
+    """
+    Resolve the names in `queries` and group them by source.
+
+    Return (results, groups): `results` holds the (status, None) answer of
+    every query whose names failed to resolve (None elsewhere), and
+    `groups` maps each source person_id to its [(index, target person_id)].
+    """
+    results = [None] * len(queries)
+    groups = {}
+    for i, (source_name, target_name) in enumerate(queries):
+        source, status = resolve(source_name)
+        if source is None:
+            results[i] = (status, None)
+            continue
+        target, status = resolve(target_name)
+        if target is None:
+            results[i] = (status, None)
+            continue
+        groups.setdefault(source, []).append((i, target))
+    return results, groups
+
+
+def largest_first(groups):
+    """
+    Return the (source, targets) items of `groups`, most targets first:
+    the trees of large groups are searched and cached first, and can
+    then answer the queries of smaller groups that end at their source.
+    """
+    return sorted(groups.items(), key=lambda item: len(item[1]), reverse=True)
+
+
+def answer_group(cache, source, targets):
+    """
+    Answer every [(index, target person_id)] query from one source.
+    Return a list of (index, (status, path)) pairs.
+
+    A cached tree of the source answers every query; otherwise, a cached
+    tree of a target answers that query backwards, since co-starring
+    is symmetric.
+    """
+    graph = degrees.graph
+    s = graph.person_index[source]
+    tree = cache.cached(s)
+
+    answers = []
+    remaining = []
+    for i, target in targets:
+        t = graph.person_index[target]
+        if tree is not None:
+            answers.append((i, result(degrees.path_to_ids(tree.path_to(t)))))
+        elif (reverse := cache.cached(t)) is not None:
+            answers.append((i, result(degrees.path_to_ids(reverse.path_from(s)))))
+        else:
+            remaining.append((i, target))
+
+    # A lone target is answered faster by a bidirectional search
+    if len(remaining) == 1:
+        i, target = remaining[0]
+        answers.append((i, result(degrees.bidirectional_shortest_path(source, target))))
+    elif remaining:
+        tree = cache.get(s)
+        answers.extend(
+            (i, result(degrees.path_to_ids(tree.path_to(graph.person_index[target]))))
+            for i, target in remaining
+        )
+    return answers
+
+
+def resolve(name):
+    """
+    Return (person_id, "ok") for a name matching exactly one person,
+    or (None, reason) otherwise.
+    """
+    person_ids = degrees.person_ids_for_name(name)
+    if len(person_ids) == 0:
+        return None, "not found"
+    elif len(person_ids) > 1:
+        return None, "ambiguous"
+    return person_ids[0], "ok"
+
+
+def result(path):
+    """
+    Return the (status, path) result for a search outcome.
+    """
+    return ("ok", path) if path is not None else ("not connected", None)
+
+
+def describe(path):
+    """
+    Return a path as readable text: "movie: person" steps joined by " > ".
+    """
+    return " > ".join(
+        f"{degrees.movies[movie_id]['title']}: {degrees.people[person_id]['name']}"
+        for movie_id, person_id in path
+    )
+
+
+if __name__ == "__main__":
+    main()
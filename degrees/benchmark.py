@@ -0,0 +1,71 @@
+import multiprocessing
+import random
+import resource
+import sys
+import time
+
+import degrees
+
+# Number of random sources timed for single-source sweeps
+SOURCES = 10
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python benchmark.py [directory]")
+    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+
+    # Each CSV loader runs in a fresh process so peak memory is its own
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        for streaming in (False, True):
+            seconds, peak = pool.apply(time_loader, (directory, streaming))
+            name = "load_csv_streaming" if streaming else "load_csv"
+            report(name, seconds)
+            print(f"  peak RSS {peak / 1024:.0f} MB")
+
+    start = time.perf_counter()
+    degrees.load_data(directory)
+    report("load_data", time.perf_counter() - start)
+    graph = degrees.graph
+    print(f"  {len(graph.person_ids)} people, {len(graph.movie_ids)} movies, "
+          f"{len(graph.person_movies)} star credits")
+
+    # Full-graph sweep: every person and every credit is visited exactly once
+    start = time.perf_counter()
+    components = graph.components()
+    report("components (full sweep)", time.perf_counter() - start)
+    print(f"  {len(components)} components, largest has {components[0][0]} people")
+
+    # Single-source sweeps from random people
+    sources = random.sample(range(len(graph.person_ids)), min(SOURCES, len(graph.person_ids)))
+    for name, sweep in [
+        ("level_counts", graph.level_counts),
+        ("search_tree", graph.search_tree),
+    ]:
+        start = time.perf_counter()
+        for source in sources:
+            sweep(source)
+        report(f"{name} (per source)", (time.perf_counter() - start) / len(sources))
+
+
+def time_loader(directory, streaming):
+    """
+    Load `directory` from CSV (no snapshot) and return the time taken
+    and the peak resident memory of this process, in KB.
+    """
+    start = time.perf_counter()
+    degrees.load_data(directory, use_snapshot=False, streaming=streaming)
+    seconds = time.perf_counter() - start
+    return seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def report(name, seconds):
+    """
+    Print one timing line.
+    """
+    print(f"{name:<28} {seconds * 1000:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
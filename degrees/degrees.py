@@ -1,21 +1,77 @@
 import csv
 import sys
 
-from util import Node, StackFrontier, QueueFrontier
+import snapshot
+from graph import CoStarGraph
+from nameindex import NameIndex
+from records import Movie, Person
+
+# Size of the read buffer used by the streaming loader
+BUFFER_SIZE = 1 << 20
 
 # Maps names to a set of corresponding person_ids
 names = {}
 
-# Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
+# Maps person_ids to a dictionary of: name, birth
+# (a Person record when loaded with streaming=True)
 people = {}
 
-# Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
+# Maps movie_ids to a dictionary of: title, year
+# (a Movie record when loaded with streaming=True)
 movies = {}
 
+# True if people and movies hold Person/Movie records rather than dictionaries
+use_records = False
+
+# Compact co-star graph (who starred in which movie) over dense integer ids
+graph = None
+
+# Prefix and fuzzy index over the keys of names
+name_index = None
+
 
-def load_data(directory):
+def load_data(directory, use_snapshot=True, streaming=False):
     """
     Load data from CSV files into memory.
+
+    If `use_snapshot` is True, memory-map the binary snapshot left by a
+    previous load when the CSV files have not changed since, and write a
+    fresh snapshot after parsing the CSV files otherwise.
+
+    If `streaming` is True, parse the CSV files with the low-allocation
+    loader (see load_csv_streaming).
+    """
+    global graph, name_index, use_records
+
+    use_records = streaming
+
+    if use_snapshot:
+        cached = snapshot.read(directory)
+        if cached is not None:
+            cached_people, cached_movies, cached_names, arrays = cached
+            people.update(cached_people)
+            movies.update(cached_movies)
+            names.update(cached_names)
+            use_records = isinstance(next(iter(people.values()), None), Person)
+            graph = CoStarGraph.from_arrays(people, movies, **arrays)
+            name_index = NameIndex(names)
+            return
+
+    if streaming:
+        graph = load_csv_streaming(directory)
+    else:
+        graph = load_csv(directory)
+
+    name_index = NameIndex(names)
+
+    if use_snapshot:
+        snapshot.write(directory, people, movies, names, graph)
+
+
+def load_csv(directory):
+    """
+    Load people, movies and names from the CSV files in `directory`,
+    and return the co-star graph built from stars.csv.
     """
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
@@ -24,8 +80,7 @@ def load_data(directory):
             # fill people dictionary
             people[row["id"]] = {
                 "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
+                "birth": row["birth"]
             }
             # fill names dictionary
             if row["name"].lower() not in names:
@@ -40,21 +95,187 @@ def load_data(directory):
             # fill names dictionary
             movies[row["id"]] = {
                 "title": row["title"],
-                "year": row["year"],
-                "stars": set()
+                "year": row["year"]
             }
 
-    # Load stars
+    # Load stars straight into the compact graph (unknown ids are skipped)
     with open(f"{directory}/stars.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
+        return CoStarGraph(
+            people, movies,
+            ((row["person_id"], row["movie_id"]) for row in reader)
+        )
+
+
+def load_csv_streaming(directory):
+    """
+    Same as load_csv, but with fewer and smaller allocations: rows are
+    read positionally through a large buffer instead of as one dictionary
+    each, repeated strings are interned, and people and movies are stored
+    as __slots__ records.
+    """
+    # Load people
+    with open_csv(directory, "people.csv") as f:
+        reader = csv.reader(f)
+        id_column, name_column, birth_column = columns(next(reader), "id", "name", "birth")
         for row in reader:
-            try:
-                # fill movies dictionary in people dictionary
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                # fill stars dictionary in movies dictionary
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+            person_id = row[id_column]
+            name = row[name_column]
+            people[person_id] = Person(name, sys.intern(row[birth_column]))
+            key = name.lower()
+            if key not in names:
+                names[key] = {person_id}
+            else:
+                names[key].add(person_id)
+
+    # Load movies
+    with open_csv(directory, "movies.csv") as f:
+        reader = csv.reader(f)
+        id_column, title_column, year_column = columns(next(reader), "id", "title", "year")
+        for row in reader:
+            movies[row[id_column]] = Movie(row[title_column], sys.intern(row[year_column]))
+
+    # Load stars straight into the compact graph (unknown ids are skipped)
+    with open_csv(directory, "stars.csv") as f:
+        reader = csv.reader(f)
+        person_column, movie_column = columns(next(reader), "person_id", "movie_id")
+        return CoStarGraph(
+            people, movies,
+            ((row[person_column], row[movie_column]) for row in reader)
+        )
+
+
+def open_csv(directory, filename):
+    """
+    Open a CSV file of `directory` for reading through a large buffer.
+    """
+    return open(f"{directory}/{filename}", encoding="utf-8", newline="", buffering=BUFFER_SIZE)
+
+
+def columns(header, *fields):
+    """
+    Return the positions of `fields` in a CSV header row.
+    """
+    return [header.index(field) for field in fields]
+
+
+def apply_delta(directory):
+    """
+    Apply a delta directory to the loaded data without reloading it.
+
+    Rows in people.csv, movies.csv and stars.csv (same columns as the
+    full dataset, each file optional) are added; rows in
+    removed_people.csv, removed_movies.csv (id column) and
+    removed_stars.csv are removed. Removals are applied after additions.
+    """
+    def rows(filename):
+        try:
+            with open(f"{directory}/{filename}", encoding="utf-8") as f:
+                return list(csv.DictReader(f))
+        except FileNotFoundError:
+            return []
+
+    add_people(rows("people.csv"))
+    add_movies(rows("movies.csv"))
+    add_stars(rows("stars.csv"))
+    remove_stars(rows("removed_stars.csv"))
+    remove_movies(row["id"] for row in rows("removed_movies.csv"))
+    remove_people(row["id"] for row in rows("removed_people.csv"))
+
+
+def add_people(rows):
+    """
+    Add (or rename) people from rows with id, name and birth keys.
+    """
+    for row in rows:
+        if row["id"] in people:
+            forget_name(row["id"])
+        if use_records:
+            people[row["id"]] = Person(row["name"], row["birth"])
+        else:
+            people[row["id"]] = {
+                "name": row["name"],
+                "birth": row["birth"]
+            }
+        names.setdefault(row["name"].lower(), set()).add(row["id"])
+        name_index.add(row["name"].lower())
+        graph.add_person(row["id"])
+
+
+def add_movies(rows):
+    """
+    Add (or update) movies from rows with id, title and year keys.
+    """
+    for row in rows:
+        if use_records:
+            movies[row["id"]] = Movie(row["title"], row["year"])
+        else:
+            movies[row["id"]] = {
+                "title": row["title"],
+                "year": row["year"]
+            }
+        graph.add_movie(row["id"])
+
+
+def add_stars(rows):
+    """
+    Add star credits from rows with person_id and movie_id keys.
+    Rows referring to unknown people or movies are skipped.
+    """
+    for row in rows:
+        if row["person_id"] in people and row["movie_id"] in movies:
+            graph.add_star(
+                graph.person_index[row["person_id"]], graph.movie_index[row["movie_id"]]
+            )
+
+
+def remove_stars(rows):
+    """
+    Remove star credits given as rows with person_id and movie_id keys.
+    """
+    for row in rows:
+        if row["person_id"] in people and row["movie_id"] in movies:
+            graph.remove_star(
+                graph.person_index[row["person_id"]], graph.movie_index[row["movie_id"]]
+            )
+
+
+def remove_people(person_ids):
+    """
+    Remove people, along with all of their star credits.
+    """
+    for person_id in person_ids:
+        if person_id not in people:
+            continue
+        p = graph.person_index[person_id]
+        for m in list(graph.movies_for(p)):
+            graph.remove_star(p, m)
+        forget_name(person_id)
+        del people[person_id]
+
+
+def remove_movies(movie_ids):
+    """
+    Remove movies, along with all of their star credits.
+    """
+    for movie_id in movie_ids:
+        if movie_id not in movies:
+            continue
+        m = graph.movie_index[movie_id]
+        for p in list(graph.stars_for(m)):
+            graph.remove_star(p, m)
+        del movies[movie_id]
+
+
+def forget_name(person_id):
+    """
+    Remove a person's current name from names and the name index.
+    """
+    key = people[person_id]["name"].lower()
+    names[key].discard(person_id)
+    if not names[key]:
+        del names[key]
+        name_index.remove(key)
 
 
 def main():
@@ -76,7 +297,7 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = shortest_path(source, target, bidirectional=True)
 
     if path is None:
         print("Not connected.")
@@ -91,54 +312,76 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=False):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    If `bidirectional` is True, search from both ends at once
+    (see bidirectional_shortest_path).
+
+    If no possible path, returns None.
+    """
+    if bidirectional:
+        return bidirectional_shortest_path(source, target)
+
+    # Search runs over dense integer indices => translate at both ends
+    path = graph.shortest_path(
+        graph.person_index[source], graph.person_index[target]
+    )
+    return path_to_ids(path)
+
+
+def bidirectional_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, using Breadth-First Search
+    grown alternately from the source and from the target.
+
+    Each round expands one full level of the smaller frontier, so the
+    first meeting point found gives a shortest path.
+
     If no possible path, returns None.
     """
+    path = graph.bidirectional_shortest_path(
+        graph.person_index[source], graph.person_index[target]
+    )
+    return path_to_ids(path)
+
+
+def all_shortest_paths(source, target, limit=None):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, at most `limit` of them.
+    """
+    paths = graph.all_shortest_paths(
+        graph.person_index[source], graph.person_index[target], limit
+    )
+    for path in paths:
+        yield path_to_ids(path)
+
+
+def k_shortest_paths(source, target, k, max_length=None):
+    """
+    Yields up to `k` lists of (movie_id, person_id) pairs that connect
+    the source to the target without repeating a person, shortest first.
+    """
+    paths = graph.k_shortest_paths(
+        graph.person_index[source], graph.person_index[target], k, max_length
+    )
+    for path in paths:
+        yield path_to_ids(path)
+
+
+def path_to_ids(path):
+    """
+    Converts a path of (movie, person) graph indices
+    into (movie_id, person_id) pairs. None stays None.
+    """
+    if path is None:
+        return None
+    return [(graph.movie_ids[m], graph.person_ids[p]) for m, p in path]
 
-    # Initialize frontier to just the starting position => source
-    start = Node(state=source, parent=None, action=None)
-    frontier = QueueFrontier() # Queue is used for Breadth-First Search
-    frontier.add(start)
-
-    # Initialize an empty explored set
-    explored = set()
-       
-    # Keep looping until solution found
-    while True:
-
-        # If nothing left in frontier, then no path
-        if frontier.empty():
-            return None
-
-        # Choose a node from the frontier
-        node = frontier.remove()
-
-        # If node is the goal, then we have a solution as a path => target
-        if node.state == target:
-            path = []
-            # Backtrack to construct the path
-            while node.parent is not None:
-                path.append((node.action, node.state))
-                node = node.parent
-            path.reverse()
-            return path
-
-        # Mark node as explored
-        explored.add(node.state)
-
-        # Add neighbors to frontier
-        for movie_id, person_id in neighbors_for_person(node.state):
-            if not frontier.contains_state(person_id) and person_id not in explored:
-                child = Node(
-                    state=person_id,    # The new actor we're moving to
-                    parent=node,        # Previous actor's node
-                    action=movie_id     # The movie that connects them
-                )
-                frontier.add(child)
 
 def person_id_for_name(name):
     """
@@ -147,8 +390,13 @@ def person_id_for_name(name):
     """
     # person_ids list to store all sets of actors' ids with the given name in names dictionary
     person_ids = list(names.get(name.lower(), set()))
-    # If no person_ids found, return None
+    # If no person_ids found, suggest close names and return None
     if len(person_ids) == 0:
+        suggestions = candidates_for_name(name, limit=5)
+        if suggestions:
+            print(f"No '{name}'. Did you mean:")
+            for person_id in suggestions:
+                print(f"  {people[person_id]['name']} (ID: {person_id})")
         return None
     # If more than one person_id found, prompt the user to choose one
     elif len(person_ids) > 1:
@@ -170,20 +418,38 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def person_ids_for_name(name):
+    """
+    Returns every person_id matching a name (case-insensitive),
+    without prompting. A known person_id matches itself.
+    """
+    if name in people:
+        return [name]
+    return sorted(names.get(name.lower(), set()))
+
+
+def candidates_for_name(name, limit=10):
+    """
+    Returns up to `limit` person_ids whose names start with or resemble
+    the given name, best match first.
+    """
+    person_ids = []
+    for key in name_index.search(name, limit):
+        person_ids.extend(sorted(names[key]))
+    return person_ids[:limit]
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
     # movie_ids are the commmon ground to identify the neighbors
-    # use inputted person_id to map with key in from movies table to find movie_ids
-    movie_ids = people[person_id]["movies"]
+    # => read both adjacency lists straight from the co-star graph
     neighbors = set()
-    for movie_id in movie_ids:
-        # use collected movie_ids to find the appropriate data pairs from stars table
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
-    return neighbors    
+    for m, p in graph.neighbors(graph.person_index[person_id]):
+        neighbors.add((graph.movie_ids[m], graph.person_ids[p]))
+    return neighbors
 
 """
 This construct is particularly useful for organizing code and ensuring 
@@ -0,0 +1,760 @@
+from array import array
+from collections import OrderedDict
+from heapq import heappop, heappush
+from itertools import count, islice
+from weakref import WeakSet
+
+
+class CoStarGraph():
+    """
+    Compact co-star graph.
+
+    People and movies are mapped to dense integer indices, and the
+    person -> movies and movie -> people adjacency lists are stored as
+    CSR (compressed sparse row) arrays: the movies of person `p` are
+    `person_movies[person_offsets[p]:person_offsets[p + 1]]`, and likewise
+    for the stars of a movie.
+
+    The CSR arrays are never modified in place. Edits (see add_star and
+    remove_star) are kept in small overlay dictionaries that movies_for
+    and stars_for merge in, until compact() folds them into new arrays.
+    """
+
+    def __init__(self, person_ids, movie_ids, stars):
+        """
+        Build the graph from a list of person ids, a list of movie ids
+        and an iterable of (person_id, movie_id) pairs.
+        Pairs referring to unknown people or movies are ignored.
+        """
+        # Maps between external ids and dense integer indices
+        self.person_ids = list(person_ids)
+        self.movie_ids = list(movie_ids)
+        self.person_index = {person_id: i for i, person_id in enumerate(self.person_ids)}
+        self.movie_index = {movie_id: i for i, movie_id in enumerate(self.movie_ids)}
+
+        # Collect edges as two parallel integer arrays
+        edge_people = array("i")
+        edge_movies = array("i")
+        for person_id, movie_id in stars:
+            try:
+                p = self.person_index[person_id]
+                m = self.movie_index[movie_id]
+            except KeyError:
+                continue
+            edge_people.append(p)
+            edge_movies.append(m)
+
+        self.person_offsets, self.person_movies = csr(
+            len(self.person_ids), edge_people, edge_movies
+        )
+        del edge_people, edge_movies
+
+        # Movie -> people adjacency is the transpose of person -> movies
+        sources = array("i")
+        for p in range(len(self.person_ids)):
+            sources.extend([p] * (self.person_offsets[p + 1] - self.person_offsets[p]))
+        self.movie_offsets, self.movie_stars = csr(
+            len(self.movie_ids), self.person_movies, sources
+        )
+        self.reset_overlay()
+
+    @classmethod
+    def from_arrays(cls, person_ids, movie_ids, person_offsets, person_movies,
+                    movie_offsets, movie_stars):
+        """
+        Rebuild a graph from previously built CSR arrays
+        (e.g. memory-mapped from a snapshot) without copying them.
+        """
+        graph = cls.__new__(cls)
+        graph.person_ids = list(person_ids)
+        graph.movie_ids = list(movie_ids)
+        graph.person_index = {person_id: i for i, person_id in enumerate(graph.person_ids)}
+        graph.movie_index = {movie_id: i for i, movie_id in enumerate(graph.movie_ids)}
+        graph.person_offsets = person_offsets
+        graph.person_movies = person_movies
+        graph.movie_offsets = movie_offsets
+        graph.movie_stars = movie_stars
+        graph.reset_overlay()
+        return graph
+
+    def reset_overlay(self):
+        """
+        Forget all edits: the graph is exactly its CSR arrays again.
+        """
+        # Number of people and movies covered by the CSR arrays
+        self.base_people = len(self.person_offsets) - 1
+        self.base_movies = len(self.movie_offsets) - 1
+
+        # Edges added on top of / removed from the CSR arrays, both ways
+        self.added_movies = {}
+        self.added_stars = {}
+        self.removed_movies = {}
+        self.removed_stars = {}
+
+        # Search tree caches to notify when an edge changes
+        if not hasattr(self, "caches"):
+            self.caches = WeakSet()
+
+        # Without edits, movies_for(p) and stars_for(m) are plain CSR slices
+        self.movies_for = self.csr_movies_for
+        self.stars_for = self.csr_stars_for
+
+    def __len__(self):
+        return len(self.person_ids)
+
+    def csr_movies_for(self, p):
+        """
+        Return the movie indices person `p` starred in, read straight
+        from the CSR arrays (the graph has no edits).
+        """
+        return self.person_movies[self.person_offsets[p]:self.person_offsets[p + 1]]
+
+    def csr_stars_for(self, m):
+        """
+        Return the person indices who starred in movie `m`, read straight
+        from the CSR arrays (the graph has no edits).
+        """
+        return self.movie_stars[self.movie_offsets[m]:self.movie_offsets[m + 1]]
+
+    def overlay_movies_for(self, p):
+        """
+        Return the movie indices person `p` starred in, with edits applied.
+        """
+        if p < self.base_people:
+            movies = self.person_movies[self.person_offsets[p]:self.person_offsets[p + 1]]
+        else:
+            movies = ()
+        if p in self.removed_movies:
+            movies = [m for m in movies if m not in self.removed_movies[p]]
+        if p in self.added_movies:
+            movies = list(movies) + sorted(self.added_movies[p])
+        return movies
+
+    def overlay_stars_for(self, m):
+        """
+        Return the person indices who starred in movie `m`, with edits applied.
+        """
+        if m < self.base_movies:
+            stars = self.movie_stars[self.movie_offsets[m]:self.movie_offsets[m + 1]]
+        else:
+            stars = ()
+        if m in self.removed_stars:
+            stars = [p for p in stars if p not in self.removed_stars[m]]
+        if m in self.added_stars:
+            stars = list(stars) + sorted(self.added_stars[m])
+        return stars
+
+    def use_overlay(self):
+        """
+        Switch movies_for and stars_for to the edit-aware lookups.
+        """
+        self.movies_for = self.overlay_movies_for
+        self.stars_for = self.overlay_stars_for
+
+    def add_person(self, person_id):
+        """
+        Add a person with no movies yet, returning their index.
+        """
+        if person_id not in self.person_index:
+            self.use_overlay()
+            self.person_index[person_id] = len(self.person_ids)
+            self.person_ids.append(person_id)
+        return self.person_index[person_id]
+
+    def add_movie(self, movie_id):
+        """
+        Add a movie with no stars yet, returning its index.
+        """
+        if movie_id not in self.movie_index:
+            self.use_overlay()
+            self.movie_index[movie_id] = len(self.movie_ids)
+            self.movie_ids.append(movie_id)
+        return self.movie_index[movie_id]
+
+    def add_star(self, p, m):
+        """
+        Record that person `p` starred in movie `m`.
+        """
+        if m in self.movies_for(p):
+            return
+        self.use_overlay()
+        stars = self.stars_for(m)
+        if m in self.removed_movies.get(p, ()):
+            discard(self.removed_movies, p, m)
+            discard(self.removed_stars, m, p)
+        else:
+            self.added_movies.setdefault(p, set()).add(m)
+            self.added_stars.setdefault(m, set()).add(p)
+        for cache in self.caches:
+            cache.edge_added(p, stars)
+
+    def remove_star(self, p, m):
+        """
+        Record that person `p` no longer starred in movie `m`.
+        """
+        if m not in self.movies_for(p):
+            return
+        self.use_overlay()
+        if m in self.added_movies.get(p, ()):
+            discard(self.added_movies, p, m)
+            discard(self.added_stars, m, p)
+        else:
+            self.removed_movies.setdefault(p, set()).add(m)
+            self.removed_stars.setdefault(m, set()).add(p)
+        for cache in self.caches:
+            cache.edge_removed(p, m, self.stars_for(m))
+
+    def compact(self):
+        """
+        Fold every edit into fresh CSR arrays. Indices do not change,
+        so cached search trees stay valid.
+        """
+        edge_people = array("i")
+        edge_movies = array("i")
+        for p in range(len(self.person_ids)):
+            movies = self.movies_for(p)
+            edge_people.extend([p] * len(movies))
+            edge_movies.extend(movies)
+        self.person_offsets, self.person_movies = csr(
+            len(self.person_ids), edge_people, edge_movies
+        )
+        self.movie_offsets, self.movie_stars = csr(
+            len(self.movie_ids), edge_movies, edge_people
+        )
+        self.reset_overlay()
+
+    def neighbors(self, p):
+        """
+        Yield (movie, person) index pairs for people who starred with `p`.
+        """
+        for m in self.movies_for(p):
+            for q in self.stars_for(m):
+                yield m, q
+
+    def shortest_path(self, source, target):
+        """
+        Return the shortest list of (movie, person) index pairs
+        connecting `source` to `target` using Breadth-First Search,
+        or None if they are not connected.
+        """
+        if source == target:
+            return []
+
+        movies_for, stars_for = self.movies_for, self.stars_for
+
+        # parent_person[q] == -1 => q not reached yet
+        parent_person = array("i", [-1]) * len(self.person_ids)
+        parent_movie = array("i", [-1]) * len(self.person_ids)
+        # Every star of a movie is reached the first time the movie is
+        # scanned, so each movie only needs scanning once
+        scanned = bytearray(len(self.movie_ids))
+
+        parent_person[source] = source
+        frontier = [source]
+        while frontier:
+            next_frontier = []
+            for p in frontier:
+                for m in movies_for(p):
+                    if scanned[m]:
+                        continue
+                    scanned[m] = 1
+                    for q in stars_for(m):
+                        if parent_person[q] != -1:
+                            continue
+                        parent_person[q] = p
+                        parent_movie[q] = m
+                        if q == target:
+                            return backtrack(parent_person, parent_movie, source, target)
+                        next_frontier.append(q)
+            frontier = next_frontier
+
+        return None
+
+    def bidirectional_shortest_path(self, source, target):
+        """
+        Return the shortest list of (movie, person) index pairs
+        connecting `source` to `target`, growing Breadth-First Search
+        frontiers alternately from both ends (always the smaller one),
+        or None if they are not connected.
+        """
+        if source == target:
+            return []
+
+        n = len(self.person_ids)
+        movies_for, stars_for = self.movies_for, self.stars_for
+
+        # One set of parent arrays and scanned movies per direction
+        forward = (array("i", [-1]) * n, array("i", [-1]) * n, bytearray(len(self.movie_ids)))
+        backward = (array("i", [-1]) * n, array("i", [-1]) * n, bytearray(len(self.movie_ids)))
+        forward[0][source] = source
+        backward[0][target] = target
+        forward_frontier = [source]
+        backward_frontier = [target]
+
+        while forward_frontier and backward_frontier:
+
+            # Always expand the smaller side
+            if len(forward_frontier) <= len(backward_frontier):
+                frontier, side, other = forward_frontier, forward, backward
+            else:
+                frontier, side, other = backward_frontier, backward, forward
+            parent_person, parent_movie, scanned = side
+            reached = other[0]
+
+            # Expand the whole level before growing the other side
+            next_frontier = []
+            for p in frontier:
+                for m in movies_for(p):
+                    if scanned[m]:
+                        continue
+                    scanned[m] = 1
+                    for q in stars_for(m):
+                        if parent_person[q] != -1:
+                            continue
+                        parent_person[q] = p
+                        parent_movie[q] = m
+                        # Both searches met => join the two halves of the path
+                        if reached[q] != -1:
+                            return (
+                                backtrack(forward[0], forward[1], source, q)
+                                + forward_track(backward[0], backward[1], target, q)
+                            )
+                        next_frontier.append(q)
+
+            if side is forward:
+                forward_frontier = next_frontier
+            else:
+                backward_frontier = next_frontier
+
+        return None
+
+    def distances(self, source, target=None):
+        """
+        Run a Breadth-First Search from `source` and return an array of
+        every person's distance from it (-1 if not reached).
+
+        If `target` is given, stop once its whole level has been reached:
+        distances are then exact up to the target's distance.
+        """
+        movies_for, stars_for = self.movies_for, self.stars_for
+
+        distance = array("i", [-1]) * len(self.person_ids)
+        scanned = bytearray(len(self.movie_ids))
+
+        distance[source] = 0
+        frontier = [source]
+        level = 0
+        while frontier and (target is None or distance[target] == -1):
+            level += 1
+            next_frontier = []
+            for p in frontier:
+                for m in movies_for(p):
+                    if scanned[m]:
+                        continue
+                    scanned[m] = 1
+                    for q in stars_for(m):
+                        if distance[q] == -1:
+                            distance[q] = level
+                            next_frontier.append(q)
+            frontier = next_frontier
+
+        return distance
+
+    def all_shortest_paths(self, source, target, limit=None):
+        """
+        Yield every shortest list of (movie, person) index pairs
+        connecting `source` to `target`, at most `limit` of them.
+        Paths through different movies count as different paths.
+
+        One BFS layers the graph by distance from `source`; paths are
+        then streamed from the DAG of edges going one layer closer.
+        """
+        distance = self.distances(source, target)
+        if distance[target] == -1:
+            return
+        paths = self.layered_paths(source, target, distance)
+        yield from islice(paths, limit)
+
+    def layered_paths(self, source, target, distance):
+        """
+        Yield every path from `source` to `target` in which each step
+        goes one layer closer to `source`, walking back from `target`.
+        """
+        # Depth-first over predecessors: each stack entry is
+        # (person, (movie, person) steps already fixed after it)
+        stack = [(target, [])]
+        while stack:
+            q, suffix = stack.pop()
+            if q == source:
+                yield suffix
+                continue
+            level = distance[q] - 1
+            for m in self.movies_for(q):
+                for p in self.stars_for(m):
+                    # Every person of a layer has a predecessor in the one
+                    # before, so this never leads to a dead end
+                    if distance[p] == level:
+                        stack.append((p, [(m, q)] + suffix))
+
+    def k_shortest_paths(self, source, target, k, max_length=None):
+        """
+        Yield up to `k` simple lists of (movie, person) index pairs
+        connecting `source` to `target`, shortest first, never longer
+        than `max_length` steps.
+
+        Yen's algorithm: each new path deviates from one already found
+        at some spur person, through the shortest path from there that
+        avoids the people before the spur and the steps already taken
+        from it by paths sharing that prefix. Every path found costs at
+        most one Breadth-First Search per step, however many longer
+        paths exist.
+        """
+        if source == target:
+            yield []
+            return
+        path = self.shortest_path(source, target)
+
+        paths = []
+        seen = set()
+        # Deviation paths not yielded yet, as (length, order, path)
+        candidates = []
+        order = count()
+        while path is not None and (max_length is None or len(path) <= max_length):
+            yield path
+            paths.append(path)
+            if len(paths) == k:
+                return
+
+            people = [source] + [q for _, q in path]
+            for i in range(len(path)):
+                prefix = path[:i]
+                taken = {other[i] for other in paths if other[:i] == prefix}
+                spur_path = self.shortest_path_avoiding(
+                    people[i], target, people[:i], taken
+                )
+                if spur_path is None:
+                    continue
+                candidate = prefix + spur_path
+                if tuple(candidate) not in seen:
+                    seen.add(tuple(candidate))
+                    heappush(candidates, (len(candidate), next(order), candidate))
+
+            path = heappop(candidates)[2] if candidates else None
+
+    def shortest_path_avoiding(self, source, target, people, steps):
+        """
+        Return the shortest list of (movie, person) index pairs
+        connecting `source` to `target` through none of `people`, and
+        not starting with any of the (movie, person) `steps`, or None if
+        there is no such path.
+        """
+        movies_for, stars_for = self.movies_for, self.stars_for
+
+        parent_person = array("i", [-1]) * len(self.person_ids)
+        parent_movie = array("i", [-1]) * len(self.person_ids)
+        scanned = bytearray(len(self.movie_ids))
+
+        # Avoided people count as reached, so they are never entered
+        for p in people:
+            parent_person[p] = p
+
+        # A movie whose step from the source is avoided must be scanned
+        # again from its other stars, who may reach that person through it
+        avoided_movies = {m for m, _ in steps}
+
+        parent_person[source] = source
+        frontier = [source]
+        while frontier:
+            next_frontier = []
+            for p in frontier:
+                for m in movies_for(p):
+                    if scanned[m]:
+                        continue
+                    if p != source or m not in avoided_movies:
+                        scanned[m] = 1
+                    for q in stars_for(m):
+                        if parent_person[q] != -1 or (p == source and (m, q) in steps):
+                            continue
+                        parent_person[q] = p
+                        parent_movie[q] = m
+                        if q == target:
+                            return backtrack(parent_person, parent_movie, source, target)
+                        next_frontier.append(q)
+            frontier = next_frontier
+
+        return None
+
+    def search_tree(self, source):
+        """
+        Run a complete Breadth-First Search from `source` and return
+        the resulting SearchTree, which answers shortest paths from
+        `source` to every other person.
+        """
+        movies_for, stars_for = self.movies_for, self.stars_for
+
+        parent_person = array("i", [-1]) * len(self.person_ids)
+        parent_movie = array("i", [-1]) * len(self.person_ids)
+        scanned = bytearray(len(self.movie_ids))
+
+        parent_person[source] = source
+        frontier = [source]
+        while frontier:
+            next_frontier = []
+            for p in frontier:
+                for m in movies_for(p):
+                    if scanned[m]:
+                        continue
+                    scanned[m] = 1
+                    for q in stars_for(m):
+                        if parent_person[q] == -1:
+                            parent_person[q] = p
+                            parent_movie[q] = m
+                            next_frontier.append(q)
+            frontier = next_frontier
+
+        return SearchTree(source, parent_person, parent_movie)
+
+    def level_counts(self, source, seen=None, scanned=None):
+        """
+        Run a level-synchronous Breadth-First Search from `source` and
+        return the number of people first reached at each distance
+        (index 0 is the source itself).
+
+        `seen` and `scanned` are optional bytearrays marking people and
+        movies already visited; they are updated in place, which lets
+        sweeps over different components share them.
+        """
+        movies_for, stars_for = self.movies_for, self.stars_for
+        if seen is None:
+            seen = bytearray(len(self.person_ids))
+        if scanned is None:
+            scanned = bytearray(len(self.movie_ids))
+
+        seen[source] = 1
+        frontier = [source]
+        counts = []
+        while frontier:
+            counts.append(len(frontier))
+
+            # Gather every movie of the whole level at once, scanning each once
+            level_movies = []
+            for p in frontier:
+                level_movies.extend(movies_for(p))
+            level_movies = [m for m in set(level_movies) if not scanned[m]]
+            for m in level_movies:
+                scanned[m] = 1
+
+            # Then all of their stars, keeping only people not seen yet
+            stars = []
+            for m in level_movies:
+                stars.extend(stars_for(m))
+            frontier = [q for q in set(stars) if not seen[q]]
+            for q in frontier:
+                seen[q] = 1
+
+        return counts
+
+    def components(self):
+        """
+        Return the sizes of the connected components of the graph,
+        largest first, as a list of (size, representative person) pairs.
+        """
+        seen = bytearray(len(self.person_ids))
+        scanned = bytearray(len(self.movie_ids))
+        sizes = []
+        for p in range(len(self.person_ids)):
+            if not seen[p]:
+                sizes.append((sum(self.level_counts(p, seen, scanned)), p))
+        sizes.sort(reverse=True)
+        return sizes
+
+
+class SearchTree():
+    """
+    Shortest-path tree of a complete Breadth-First Search from `source`.
+    """
+
+    def __init__(self, source, parent_person, parent_movie):
+        self.source = source
+        self.parent_person = parent_person
+        self.parent_movie = parent_movie
+
+    def reached(self, person):
+        """
+        Return True if `person` is connected to the source.
+        """
+        # People added after the search are not part of the tree
+        return person < len(self.parent_person) and self.parent_person[person] != -1
+
+    def distance(self, person):
+        """
+        Return the number of steps from the source to `person`,
+        or None if they are not connected.
+        """
+        if not self.reached(person):
+            return None
+        steps = 0
+        while person != self.source:
+            person = self.parent_person[person]
+            steps += 1
+        return steps
+
+    def path_to(self, target):
+        """
+        Return the shortest list of (movie, person) index pairs from the
+        source to `target`, or None if they are not connected.
+        """
+        if not self.reached(target):
+            return None
+        return backtrack(self.parent_person, self.parent_movie, self.source, target)
+
+    def path_from(self, person):
+        """
+        Return the shortest list of (movie, person) index pairs from
+        `person` to the source, or None if they are not connected.
+        Co-starring is symmetric, so the tree answers both directions.
+        """
+        if not self.reached(person):
+            return None
+        return forward_track(self.parent_person, self.parent_movie, self.source, person)
+
+
+class SearchTreeCache():
+    """
+    Least-recently-used cache of SearchTrees keyed by source person.
+    """
+
+    def __init__(self, graph, capacity=16):
+        self.graph = graph
+        self.capacity = capacity
+        self.trees = OrderedDict()
+        graph.caches.add(self)
+
+    def __contains__(self, source):
+        return source in self.trees
+
+    def cached(self, source):
+        """
+        Return the SearchTree for `source` if it is cached, else None,
+        without searching.
+        """
+        if source not in self.trees:
+            return None
+        self.trees.move_to_end(source)
+        return self.trees[source]
+
+    def get(self, source):
+        """
+        Return the SearchTree for `source`, searching (and evicting the
+        least recently used tree) only if it is not cached yet.
+        """
+        tree = self.cached(source)
+        if tree is not None:
+            return tree
+
+        tree = self.graph.search_tree(source)
+        if self.capacity > 0:
+            self.trees[source] = tree
+            while len(self.trees) > self.capacity:
+                self.trees.popitem(last=False)
+        return tree
+
+    def edge_added(self, p, stars):
+        """
+        Drop the trees that an edge from person `p` to a movie with
+        stars `stars` makes out of date: those where the new edge joins
+        a reached person to an unreached one, or shortcuts a level.
+        """
+        people = [p, *stars]
+        for source, tree in list(self.trees.items()):
+            distances = [tree.distance(q) for q in people]
+            reached = [d for d in distances if d is not None]
+            if not reached:
+                continue
+            if len(reached) < len(people) or max(reached) - min(reached) > 1:
+                del self.trees[source]
+
+    def edge_removed(self, p, m, stars):
+        """
+        Drop the trees that use the removed edge between person `p` and
+        movie `m` (whose remaining stars are `stars`).
+        """
+        for source, tree in list(self.trees.items()):
+            if not tree.reached(p):
+                continue
+            parent_person, parent_movie = tree.parent_person, tree.parent_movie
+            # p was reached through m, or someone was reached from p through m
+            if (parent_movie[p] == m and p != source) or any(
+                tree.reached(q) and parent_person[q] == p and parent_movie[q] == m and q != source
+                for q in stars
+            ):
+                del self.trees[source]
+
+
+def csr(size, rows, columns):
+    """
+    Return (offsets, values) CSR arrays for `size` rows, given the
+    parallel `rows` and `columns` arrays of an edge list.
+    Duplicate edges are dropped and each row's values are sorted.
+    """
+    # Count entries per row, then prefix-sum into offsets
+    counts = array("q", [0]) * (size + 1)
+    for r in rows:
+        counts[r + 1] += 1
+    for i in range(size):
+        counts[i + 1] += counts[i]
+
+    # Scatter values into their row's slot
+    values = array("i", [0]) * len(rows)
+    fill = array("q", counts)
+    for r, c in zip(rows, columns):
+        values[fill[r]] = c
+        fill[r] += 1
+
+    # Sort and deduplicate each row in place
+    offsets = array("q", [0]) * (size + 1)
+    end = 0
+    for i in range(size):
+        row = sorted(set(values[counts[i]:counts[i + 1]]))
+        values[end:end + len(row)] = array("i", row)
+        end += len(row)
+        offsets[i + 1] = end
+    del values[end:]
+
+    return offsets, values
+
+
+def discard(overlay, key, value):
+    """
+    Remove `value` from the set `overlay[key]`, dropping emptied sets.
+    """
+    values = overlay.get(key)
+    if values is not None:
+        values.discard(value)
+        if not values:
+            del overlay[key]
+
+
+def backtrack(parent_person, parent_movie, source, person):
+    """
+    Return the (movie, person) pairs leading from `source` to `person`
+    by following parent arrays back from `person`.
+    """
+    path = []
+    while person != source:
+        path.append((parent_movie[person], person))
+        person = parent_person[person]
+    path.reverse()
+    return path
+
+
+def forward_track(parent_person, parent_movie, target, person):
+    """
+    Return the (movie, person) pairs leading from `person` to `target`
+    by following the parent arrays of a search started at `target`.
+    """
+    path = []
+    while person != target:
+        movie, person = parent_movie[person], parent_person[person]
+        path.append((movie, person))
+    return path
@@ -0,0 +1,145 @@
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+
+# Share of a query's trigrams a name must also contain to be a fuzzy match
+MIN_OVERLAP = 0.4
+
+# Most candidates scored exactly per fuzzy search
+MAX_CANDIDATES = 200
+
+
+class NameIndex():
+    """
+    Index over lowercase names for prefix and fuzzy (typo-tolerant) lookup.
+
+    Prefix search runs over a sorted list of the distinct names.
+    Fuzzy search ranks names by trigram similarity; its trigram postings
+    are built the first time a fuzzy search runs, so loading stays cheap
+    for callers that never need it.
+    """
+
+    def __init__(self, names):
+        """
+        Build the index from the keys of `names` (already lowercase).
+        """
+        self.keys = sorted(names)
+
+        # Fuzzy search state: `postings` index into `entries`, which only
+        # ever grows (removed names become None), so that names can be
+        # added and removed without renumbering
+        self.entries = None
+        self.entry_index = None
+        self.postings = None
+
+    def add(self, name):
+        """
+        Add a (lowercase) name to the index.
+        """
+        i = bisect_left(self.keys, name)
+        if i < len(self.keys) and self.keys[i] == name:
+            return
+        insort(self.keys, name)
+        if self.postings is not None:
+            self.add_postings(name)
+
+    def remove(self, name):
+        """
+        Remove a (lowercase) name from the index.
+        """
+        i = bisect_left(self.keys, name)
+        if i == len(self.keys) or self.keys[i] != name:
+            return
+        del self.keys[i]
+        if self.postings is not None:
+            self.entries[self.entry_index.pop(name)] = None
+
+    def prefix(self, query, limit=10):
+        """
+        Return up to `limit` indexed names starting with `query`,
+        in alphabetical order.
+        """
+        query = query.lower()
+        matches = []
+        i = bisect_left(self.keys, query)
+        while i < len(self.keys) and len(matches) < limit and self.keys[i].startswith(query):
+            matches.append(self.keys[i])
+            i += 1
+        return matches
+
+    def fuzzy(self, query, limit=10):
+        """
+        Return up to `limit` indexed names most similar to `query`,
+        best first, by Dice similarity of their character trigrams.
+        """
+        if self.postings is None:
+            self.build_postings()
+
+        query_grams = trigrams(query.lower())
+        if not query_grams:
+            return []
+
+        # A name sharing at least `needed` trigrams must share one of the
+        # rarest (n - needed + 1) trigrams => only read those postings
+        needed = max(1, round(len(query_grams) * MIN_OVERLAP))
+        rarest = sorted(query_grams, key=lambda gram: len(self.postings.get(gram, ())))
+        hits = Counter()
+        for gram in rarest[:len(query_grams) - needed + 1]:
+            hits.update(self.postings.get(gram, ()))
+
+        # Score the names hitting the most rare trigrams exactly
+        scores = Counter()
+        for i, _ in hits.most_common(MAX_CANDIDATES):
+            if self.entries[i] is None:
+                continue
+            grams = trigrams(self.entries[i])
+            shared = len(query_grams & grams)
+            if shared >= needed:
+                scores[i] = 2 * shared / (len(query_grams) + len(grams))
+
+        return [self.entries[i] for i, _ in scores.most_common(limit)]
+
+    def search(self, query, limit=10):
+        """
+        Return up to `limit` ranked candidate names for `query`:
+        prefix matches (exact match first), then fuzzy matches.
+        """
+        matches = self.prefix(query, limit)
+        if len(matches) < limit:
+            for name in self.fuzzy(query, limit):
+                if name not in matches:
+                    matches.append(name)
+                if len(matches) == limit:
+                    break
+        return matches
+
+    def build_postings(self):
+        """
+        Map every trigram to the array of indices of names containing it.
+        """
+        self.entries = []
+        self.entry_index = {}
+        self.postings = {}
+        for name in self.keys:
+            self.add_postings(name)
+
+    def add_postings(self, name):
+        """
+        Append `name` to the fuzzy search entries and postings.
+        """
+        i = len(self.entries)
+        self.entries.append(name)
+        self.entry_index[name] = i
+        for gram in trigrams(name):
+            if gram not in self.postings:
+                self.postings[gram] = array("i")
+            self.postings[gram].append(i)
+
+
+def trigrams(text):
+    """
+    Return the set of character trigrams of `text`, padded so that
+    the first and last letters also count.
+    """
+    text = f"  {text} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
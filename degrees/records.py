@@ -0,0 +1,42 @@
+class Record():
+    """
+    Fixed-field record stored in __slots__ (no per-instance dict).
+
+    Fields can also be read as `record["field"]`, so records stand in
+    for the {"field": value} dictionaries used elsewhere.
+    """
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def keys(self):
+        return self.__slots__
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(
+            getattr(self, key) == getattr(other, key) for key in self.__slots__
+        )
+
+    def __repr__(self):
+        fields = ", ".join(f"{key}={getattr(self, key)!r}" for key in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class Person(Record):
+    __slots__ = ("name", "birth")
+
+    def __init__(self, name, birth):
+        self.name = name
+        self.birth = birth
+
+
+class Movie(Record):
+    __slots__ = ("title", "year")
+
+    def __init__(self, title, year):
+        self.title = title
+        self.year = year
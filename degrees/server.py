@@ -0,0 +1,266 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+
+import degrees
+from batch import resolve
+
+# Default address: "host:port" for TCP, anything else is a Unix socket path
+ADDRESS = "127.0.0.1:8765"
+
+# Number of processes running searches
+WORKERS = os.cpu_count() or 1
+
+# Most paths returned by one "paths" request
+MAX_PATHS = 100
+
+# Pool searches are offloaded to, replaced if a worker dies (see run)
+executor = None
+
+# File descriptors of the sockets open in this process: workers forked
+# while they are open close their copies (see close_sockets)
+sockets = set()
+
+
+def main():
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python server.py [directory] [host:port | socket path]")
+    directory = sys.argv[1] if len(sys.argv) >= 2 else "large"
+    address = sys.argv[2] if len(sys.argv) == 3 else ADDRESS
+
+    # Load data once, before the worker processes are forked
+    print("Loading data...")
+    degrees.load_data(directory)
+    degrees.name_index.build_postings()
+    print("Data loaded.")
+
+    try:
+        asyncio.run(serve(address))
+    except KeyboardInterrupt:
+        pass
+
+
+async def serve(address):
+    """
+    Serve newline-delimited JSON requests on `address` until cancelled.
+    """
+    global executor
+    executor = create_executor()
+
+    # Start the workers before any socket is open, so that they inherit
+    # none (workers forked later close theirs, see close_sockets)
+    await asyncio.get_running_loop().run_in_executor(executor, int)
+
+    host, _, port = address.rpartition(":")
+    if host and port.isdigit():
+        server = await asyncio.start_server(handle_connection, host, int(port))
+    else:
+        server = await asyncio.start_unix_server(handle_connection, address)
+    sockets.update(sock.fileno() for sock in server.sockets)
+
+    print(f"Serving on {address}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def create_executor():
+    """
+    Return the pool searches are offloaded to. Forked workers inherit the
+    loaded graph; without fork, fall back to threads in this process.
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(
+            WORKERS, mp_context=multiprocessing.get_context("fork"),
+            initializer=close_sockets
+        )
+    return ThreadPoolExecutor(WORKERS)
+
+
+def close_sockets():
+    """
+    Close the server's sockets in a newly forked worker: a worker holding
+    a copy of a client connection would keep it from ever closing.
+    """
+    for fd in sockets:
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+
+
+async def run(function, *args):
+    """
+    Run function(*args) in the worker pool and return its result.
+    If the pool broke (e.g. a worker was killed), replace it for later
+    requests and re-raise.
+    """
+    global executor
+    pool = executor
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, function, *args)
+    except BrokenExecutor:
+        # Requests failing together replace the pool only once
+        if executor is pool:
+            executor = create_executor()
+            pool.shutdown(wait=False, cancel_futures=True)
+        raise
+
+
+async def handle_connection(reader, writer):
+    """
+    Answer every request line sent on one connection. Requests are
+    answered concurrently, so responses may come back out of order:
+    clients match them by the "id" they sent.
+    """
+    lock = asyncio.Lock()
+    tasks = set()
+    fd = writer.get_extra_info("socket").fileno()
+    sockets.add(fd)
+
+    async def answer(line):
+        response = await handle_request(line)
+        async with lock:
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+
+    try:
+        while line := await reader.readline():
+            if line.strip():
+                task = asyncio.create_task(answer(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+    except ConnectionError:
+        pass
+    finally:
+        sockets.discard(fd)
+        writer.close()
+
+
+async def handle_request(line):
+    """
+    Decode one JSON request and return its JSON-serializable response:
+    {"id": ..., "ok": true, "result": ...} or {"id": ..., "ok": false, "error": ...}.
+
+    Supported requests:
+        {"op": "lookup", "name": ..., "limit": 10}
+        {"op": "path", "source": ..., "target": ...}
+        {"op": "paths", "source": ..., "target": ..., "limit": 10}
+    where people may be given by name or by person_id.
+    Errors never escape: whatever goes wrong, the response says so.
+    """
+    try:
+        request = json.loads(line)
+        request_id = request.get("id")
+    except (ValueError, AttributeError):
+        return {"id": None, "ok": False, "error": "invalid JSON request"}
+
+    try:
+        op = request.get("op")
+        if op == "lookup":
+            name = request["name"]
+            if not isinstance(name, str):
+                raise TypeError("name must be a string")
+            result = lookup(name, limit(request))
+        elif op in ("path", "paths"):
+            source = person(request["source"])
+            target = person(request["target"])
+            if op == "path":
+                path = await run(search, source, target)
+                result = None if path is None else describe(path)
+            else:
+                paths = await run(search_all, source, target, min(limit(request), MAX_PATHS))
+                result = [describe(path) for path in paths]
+        else:
+            raise ValueError(f"unknown op {op!r}")
+    except KeyError as e:
+        return {"id": request_id, "ok": False, "error": f"missing field {e}"}
+    except (TypeError, ValueError) as e:
+        return {"id": request_id, "ok": False, "error": str(e)}
+    except BrokenExecutor:
+        return {"id": request_id, "ok": False, "error": "search worker died, please retry"}
+    except Exception as e:
+        return {"id": request_id, "ok": False, "error": f"internal error: {e!r}"}
+
+    return {"id": request_id, "ok": True, "result": result}
+
+
+def lookup(name, limit):
+    """
+    Return up to `limit` ranked candidates for a (possibly partial or
+    misspelled) name.
+    """
+    return [
+        {"person_id": person_id, **degrees.people[person_id]}
+        for person_id in degrees.candidates_for_name(name, limit)
+    ]
+
+
+def limit(request):
+    """
+    Return the "limit" field of `request` (10 by default), raising
+    TypeError or ValueError unless it is a non-negative integer.
+    """
+    value = request.get("limit", 10)
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise TypeError("limit must be an integer")
+    if value < 0:
+        raise ValueError("limit must not be negative")
+    return value
+
+
+def person(name):
+    """
+    Return the person_id for a name or id, raising TypeError if it is
+    neither a string nor an integer, and ValueError if it matches no
+    one or several people.
+    """
+    if not isinstance(name, (str, int)) or isinstance(name, bool):
+        raise TypeError("people must be given by name or person_id")
+    person_id, status = resolve(str(name))
+    if person_id is None:
+        raise ValueError(f"{name!r}: {status}")
+    return person_id
+
+
+def search(source, target):
+    """
+    Shortest path search, run inside a worker.
+    """
+    return degrees.shortest_path(source, target, bidirectional=True)
+
+
+def search_all(source, target, limit):
+    """
+    All-shortest-paths search, run inside a worker.
+    """
+    return list(degrees.all_shortest_paths(source, target, limit))
+
+
+def describe(path):
+    """
+    Return a path as a list of JSON-serializable steps.
+    """
+    return {
+        "degrees": len(path),
+        "path": [
+            {
+                "movie_id": movie_id,
+                "movie": degrees.movies[movie_id]["title"],
+                "person_id": person_id,
+                "person": degrees.people[person_id]["name"]
+            }
+            for movie_id, person_id in path
+        ]
+    }
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import mmap
+import os
+import pickle
+import struct
+import sys
+
+# Bump VERSION whenever the layout below changes => older snapshots go stale
+MAGIC = b"DEGSNAP\0"
+VERSION = 1
+FILENAME = "degrees.snapshot"
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+# Layout (native byte order, recorded in the header):
+#   magic, version, byte order, key length, records length
+#   key      => pickled (size, mtime_ns) of every source CSV
+#   records  => pickled (people, movies, names) dictionaries
+#   4 arrays => each preceded by (typecode, item count), padded to 8 bytes
+HEADER = struct.Struct("=8sIcxxxQQ")
+ARRAY_HEADER = struct.Struct("=cxxxxxxxQ")
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_stars")
+
+
+def source_key(directory):
+    """
+    Return the (size, mtime) fingerprint of the CSV files in `directory`.
+    A snapshot is only valid for the exact same fingerprint.
+    """
+    key = []
+    for filename in SOURCES:
+        stat = os.stat(os.path.join(directory, filename))
+        key.append((stat.st_size, stat.st_mtime_ns))
+    return tuple(key)
+
+
+def write(directory, people, movies, names, graph):
+    """
+    Write a snapshot of the loaded data into `directory`.
+    Failing to write (e.g. read-only directory) is not an error:
+    the next start simply parses the CSV files again.
+    """
+    path = os.path.join(directory, FILENAME)
+    key = pickle.dumps(source_key(directory), protocol=pickle.HIGHEST_PROTOCOL)
+    records = pickle.dumps((people, movies, names), protocol=pickle.HIGHEST_PROTOCOL)
+
+    # Write to a temporary file first so readers never see a partial snapshot
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(HEADER.pack(
+                MAGIC, VERSION, sys.byteorder[0].encode(), len(key), len(records)
+            ))
+            f.write(key)
+            f.write(records)
+            for name in ARRAYS:
+                values = getattr(graph, name)
+                pad(f)
+                f.write(ARRAY_HEADER.pack(values.typecode.encode(), len(values)))
+                f.write(values)
+        os.replace(temporary, path)
+    except OSError:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+
+
+def read(directory):
+    """
+    Memory-map the snapshot in `directory` and return
+    (people, movies, names, arrays), where `arrays` maps each CSR array
+    name to a read-only memoryview over the file.
+
+    Returns None if there is no snapshot, or if it is stale
+    (CSV files changed) or was written by another version.
+    """
+    path = os.path.join(directory, FILENAME)
+    try:
+        key = source_key(directory)
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        magic, version, byteorder, key_size, records_size = HEADER.unpack_from(data)
+        if (magic != MAGIC or version != VERSION
+                or byteorder != sys.byteorder[0].encode()):
+            return None
+        offset = HEADER.size
+        if pickle.loads(data[offset:offset + key_size]) != key:
+            return None
+        offset += key_size
+        people, movies, names = pickle.loads(data[offset:offset + records_size])
+        offset += records_size
+
+        arrays = {}
+        view = memoryview(data)
+        for name in ARRAYS:
+            offset += -offset % 8
+            typecode, count = ARRAY_HEADER.unpack_from(data, offset)
+            offset += ARRAY_HEADER.size
+            typecode = typecode.decode()
+            size = count * struct.calcsize(typecode)
+            arrays[name] = view[offset:offset + size].cast(typecode)
+            offset += size
+    except (struct.error, pickle.UnpicklingError, ValueError, EOFError, IndexError):
+        return None
+
+    return people, movies, names, arrays
+
+
+def pad(f):
+    """
+    Pad file `f` with zero bytes up to the next multiple of 8.
+    """
+    f.write(b"\0" * (-f.tell() % 8))
@@ -0,0 +1,73 @@
+import functools
+import glob
+import os
+import sys
+import time
+
+import heredity
+
+
+def main():
+    filenames = sys.argv[1:] or sorted(glob.glob(os.path.join("data", "family*.csv")))
+    if not filenames:
+        sys.exit("Usage: python benchmark.py [data.csv ...]")
+
+    for filename in filenames:
+        people = heredity.load_data(filename)
+        combinations = list(all_combinations(people))
+        print(f"{filename}: {len(people)} people, {len(combinations)} combinations")
+
+        # Same combinations, same order => same results, bit for bit
+        results = {}
+        for name, joint_probability in [
+            ("direct_joint_probability", heredity.direct_joint_probability),
+            ("joint_probability", functools.partial(
+                heredity.joint_probability, tables=heredity.factor_tables(people)
+            )),
+        ]:
+            start = time.perf_counter()
+            results[name] = [
+                joint_probability(people, one_gene, two_genes, have_trait)
+                for one_gene, two_genes, have_trait in combinations
+            ]
+            report(name, time.perf_counter() - start)
+        if results["direct_joint_probability"] != results["joint_probability"]:
+            print("  results differ!")
+
+        for name, probabilities in [
+            ("enumerate_probabilities", heredity.enumerate_probabilities),
+            ("gray_probabilities", heredity.gray_probabilities),
+            ("exact_probabilities", heredity.exact_probabilities),
+        ]:
+            start = time.perf_counter()
+            probabilities(people)
+            report(name, time.perf_counter() - start)
+
+
+def all_combinations(people):
+    """
+    Yield every (one_gene, two_genes, have_trait) combination that
+    enumerate_probabilities sums over.
+    """
+    names = set(people)
+    for have_trait in heredity.powerset(names):
+        if any(
+            people[person]["trait"] is not None and
+            people[person]["trait"] != (person in have_trait)
+            for person in names
+        ):
+            continue
+        for one_gene in heredity.powerset(names):
+            for two_genes in heredity.powerset(names - one_gene):
+                yield one_gene, two_genes, have_trait
+
+
+def report(name, seconds):
+    """
+    Print one timing line.
+    """
+    print(f"  {name:<28} {seconds * 1000:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
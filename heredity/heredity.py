@@ -1,7 +1,12 @@
 import csv
 import itertools
+import math
+import multiprocessing
+import os
 import sys
 
+import inference
+
 PROBS = {
 
     # Unconditional probabilities for having gene
@@ -36,16 +41,52 @@ PROBS = {
     "mutation": 0.01
 }
 
+# Gray code steps between two exact resums of the log joint probability
+RESUM_STEPS = 1024
+
+# Shards of the enumeration per worker process, to balance their load
+SHARDS_PER_WORKER = 4
+
 
 def main():
 
     # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
-    people = load_data(sys.argv[1])
+    # Junction tree inference scales to large families; enumerating
+    # every combination is the reference, for small families only
+    modes = {
+        "--enumerate": enumerate_probabilities,
+        "--gray": gray_probabilities
+    }
+    args = sys.argv[1:]
+    solve = exact_probabilities
+    if args[:1] and args[0] in modes:
+        solve = modes[args.pop(0)]
+
+    # Optional "-j workers" to enumerate over a process pool
+    elif args[:1] == ["-j"] and len(args) >= 2 and args[1].isdigit():
+        workers = int(args[1]) or os.cpu_count()
+        solve = lambda people: parallel_probabilities(people, workers)
+        args = args[2:]
+    if len(args) != 1:
+        sys.exit("Usage: python heredity.py [--enumerate | --gray | -j workers] data.csv")
+    people = load_data(args[0])
+    probabilities = solve(people)
 
-    # Keep track of gene and trait probabilities for each person
-    probabilities = {
+    # Print results
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                print(f"    {value}: {p:.4f}")
+
+
+def empty_probabilities(people):
+    """
+    Return gene and trait distributions for each person, all zero.
+    """
+    return {
         person: {
             "gene": {
                 2: 0,
@@ -60,39 +101,361 @@ def main():
         for person in people
     }
 
+
+def enumerate_probabilities(people):
+    """
+    Return the normalized gene and trait distributions of each person,
+    by summing the joint probability of every combination of genes and
+    traits consistent with the known traits.
+    """
+
+    # Keep track of gene and trait probabilities for each person
+    probabilities = empty_probabilities(people)
+
+    # Sets of people are bitmasks: bit i stands for the i-th person
+    everyone = (1 << len(people)) - 1
+    known, shown = evidence_masks(people)
+    tables = factor_tables(people)
+
     # Loop over all sets of people who might have the trait
-    names = set(people)
-    for have_trait in powerset(names):
+    for have_trait in subsets(everyone):
 
         # Check if current set of people violates known information
-        # Trait is None 
-        fails_evidence = any(
-            (people[person]["trait"] is not None and
-             people[person]["trait"] != (person in have_trait))
-            for person in names
-        )
-        if fails_evidence:
+        if have_trait & known != shown:
             continue
 
         # Loop over all sets of people who might have the gene
-        for one_gene in powerset(names):
-            for two_genes in powerset(names - one_gene):
+        for one_gene in subsets(everyone):
+            for two_genes in subsets(everyone & ~one_gene):
 
                 # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
+                p = joint_probability(people, one_gene, two_genes, have_trait, tables)
                 update(probabilities, one_gene, two_genes, have_trait, p)
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
+    return probabilities
 
-    # Print results
+
+def parallel_probabilities(people, workers):
+    """
+    Return the same distributions as enumerate_probabilities, with the
+    combinations split into shards enumerated by a pool of `workers`
+    processes. Each worker adds up the shard's joint probabilities in
+    its own table (see enumerate_shard); the tables are then summed
+    and normalized.
+    """
+    shards = workers * SHARDS_PER_WORKER
+    tasks = [(people, shard, shards) for shard in range(shards)]
+
+    # Forked workers start faster; elsewhere use the default start method
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+    else:
+        context = multiprocessing.get_context()
+
+    probabilities = empty_probabilities(people)
+    with context.Pool(workers) as pool:
+        for partial in pool.imap_unordered(enumerate_shard_task, tasks):
+            for person in probabilities:
+                for field in probabilities[person]:
+                    for value in probabilities[person][field]:
+                        probabilities[person][field][value] += partial[person][field][value]
+
+    # Ensure probabilities sum to 1
+    normalize(probabilities)
+    return probabilities
+
+
+def enumerate_shard_task(task):
+    """
+    Run enumerate_shard on one (people, shard, shards) task in a worker.
+    """
+    return enumerate_shard(*task)
+
+
+def enumerate_shard(people, shard, shards):
+    """
+    Return the unnormalized distributions summed over one shard of the
+    combinations of enumerate_probabilities.
+
+    Every (have_trait, one_gene) pair consistent with the known traits is
+    numbered in enumeration order (people keep their order when `people`
+    is sent to a worker, and so do their bits), and shard `shard` out of
+    `shards` takes the pairs whose number is `shard` modulo `shards`,
+    with all their two_genes sets.
+    """
+    probabilities = empty_probabilities(people)
+    everyone = (1 << len(people)) - 1
+    known, shown = evidence_masks(people)
+    tables = factor_tables(people)
+    task = 0
+    for have_trait in subsets(everyone):
+        if have_trait & known != shown:
+            continue
+
+        for one_gene in subsets(everyone):
+            if task % shards == shard:
+                for two_genes in subsets(everyone & ~one_gene):
+                    p = joint_probability(people, one_gene, two_genes, have_trait, tables)
+                    update(probabilities, one_gene, two_genes, have_trait, p)
+            task += 1
+
+    return probabilities
+
+
+def evidence_masks(people):
+    """
+    Return (known, shown) bitmasks of the people whose trait is known,
+    and of those known to have it: a have_trait bitmask is consistent
+    with the known traits if have_trait & known == shown.
+    """
+    known = shown = 0
+    for i, person in enumerate(people):
+        if people[person]["trait"] is not None:
+            known |= 1 << i
+            if people[person]["trait"]:
+                shown |= 1 << i
+    return known, shown
+
+
+def gray_probabilities(people):
+    """
+    Return the same distributions as enumerate_probabilities, summing
+    the joint probability of the same combinations, but visited in
+    Gray code order (see gray_steps): each combination differs from the
+    last in one person's gene count or trait, so only the factors of
+    that person and their children change.
+
+    The joint probability is kept as a sum of log factors, with zero
+    factors counted apart: while any factor is zero, so is the joint.
+    Probabilities are added up relative to the largest one seen so far,
+    and per person only when their gene count or trait changes, so each
+    combination costs a few table lookups instead of a pass over the
+    whole family.
+    """
+    names = list(people)
+    n = len(names)
+
+    # Log factor tables; people without parents point at a phantom
+    # person n whose gene count stays 0
+    tables = []
+    mothers, fathers = [], []
+    children = [[] for _ in range(n)]
+    for i, (mother, father, table) in enumerate(factor_tables(people)):
+        tables.append([tuple(map(log, entry)) for entry in table])
+        mothers.append(mother)
+        fathers.append(father)
+        if mother < n:
+            children[mother].append(i)
+            children[father].append(i)
+
+    # Known traits are fixed: only unknown traits are enumerated
+    genes = [0] * (n + 1)
+    traits = [people[person]["trait"] is True for person in names]
+    digits = [(i, True) for i in range(n)] + [
+        (i, False) for i, person in enumerate(names) if people[person]["trait"] is None
+    ]
+
+    terms = [
+        tables[i][(genes[i] * 3 + genes[mothers[i]]) * 3 + genes[fathers[i]]][traits[i]]
+        for i in range(n)
+    ]
+    log_sum, zeros = resum(terms)
+    log_joint = log_sum if zeros == 0 else -math.inf
+
+    # Probabilities are summed in units of exp(top); total is the sum of
+    # all combinations so far, and gene_since/trait_since the total when
+    # each person's current gene count/trait was set
+    top = log_joint
+    total = 1.0 if log_joint > -math.inf else 0.0
+    gene_sums = [[0.0] * 3 for _ in range(n)]
+    trait_sums = [[0.0] * 2 for _ in range(n)]
+    gene_since = [0.0] * n
+    trait_since = [0.0] * n
+
+    # Factors to recompute when each digit changes
+    affected = [[i] + children[i] if gene else [i] for i, gene in digits]
+
+    for step, (j, delta) in enumerate(gray_steps([3 if gene else 2 for _, gene in digits]), 1):
+        i, gene = digits[j]
+        if gene:
+            gene_sums[i][genes[i]] += total - gene_since[i]
+            gene_since[i] = total
+            genes[i] += delta
+        else:
+            trait_sums[i][traits[i]] += total - trait_since[i]
+            trait_since[i] = total
+            traits[i] = not traits[i]
+        for k in affected[j]:
+            term = tables[k][(genes[k] * 3 + genes[mothers[k]]) * 3 + genes[fathers[k]]][traits[k]]
+
+            # -inf - -inf is NaN: count zero factors instead of adding them
+            if terms[k] == -math.inf:
+                zeros -= 1
+            else:
+                log_sum -= terms[k]
+            if term == -math.inf:
+                zeros += 1
+            else:
+                log_sum += term
+            terms[k] = term
+
+        # Resum now and then so rounding errors do not pile up
+        if step % RESUM_STEPS == 0:
+            log_sum, zeros = resum(terms)
+        log_joint = log_sum if zeros == 0 else -math.inf
+
+        if log_joint > top:
+            scale = math.exp(top - log_joint) if top > -math.inf else 0.0
+            total *= scale
+            for sums in gene_sums + trait_sums:
+                sums[:] = [value * scale for value in sums]
+            gene_since = [value * scale for value in gene_since]
+            trait_since = [value * scale for value in trait_since]
+            top = log_joint
+        total += math.exp(log_joint - top) if log_joint > -math.inf else 0.0
+
+    probabilities = empty_probabilities(people)
+    for i, person in enumerate(names):
+        gene_sums[i][genes[i]] += total - gene_since[i]
+        trait_sums[i][traits[i]] += total - trait_since[i]
+        for copies in (2, 1, 0):
+            probabilities[person]["gene"][copies] = gene_sums[i][copies]
+        for value in (True, False):
+            probabilities[person]["trait"][value] = trait_sums[i][value]
+
+    # Ensure probabilities sum to 1
+    normalize(probabilities)
+    return probabilities
+
+
+def resum(terms):
+    """
+    Return (exact sum of the finite log factors `terms`, number of
+    factors that are -inf, i.e. zero).
+    """
+    return (
+        math.fsum(term for term in terms if term > -math.inf),
+        sum(1 for term in terms if term == -math.inf)
+    )
+
+
+def gray_steps(radices):
+    """
+    Walk every tuple of digits, digit j ranging over 0 to radices[j] - 1,
+    in reflected mixed-radix Gray code order starting from all zeros
+    (Knuth's loopless Algorithm H): consecutive tuples differ in exactly
+    one digit, by 1. Yield (j, +1 or -1) for each step.
+    """
+    n = len(radices)
+    digits = [0] * n
+    directions = [1] * n
+    focus = list(range(n + 1))
+    while True:
+        j = focus[0]
+        focus[0] = 0
+        if j == n:
+            return
+        digits[j] += directions[j]
+        yield j, directions[j]
+        if digits[j] == 0 or digits[j] == radices[j] - 1:
+            directions[j] = -directions[j]
+            focus[j] = focus[j + 1]
+            focus[j + 1] = j + 1
+
+
+def log(x):
+    """
+    Return the natural logarithm of `x`, or -inf for 0.
+    """
+    return math.log(x) if x > 0 else -math.inf
+
+
+def exact_probabilities(people):
+    """
+    Return the same distributions as enumerate_probabilities, computed
+    by message passing over the family tree (see inference.marginals)
+    instead of enumerating every combination.
+    """
+    genes = inference.marginals(gene_factors(people))
+
+    probabilities = empty_probabilities(people)
     for person in people:
-        print(f"{person}:")
-        for field in probabilities[person]:
-            print(f"  {field.capitalize()}:")
-            for value in probabilities[person][field]:
-                p = probabilities[person][field][value]
-                print(f"    {value}: {p:.4f}")
+        for copies in (2, 1, 0):
+            probabilities[person]["gene"][copies] = genes[person][copies]
+
+        # Known traits are certain; others follow from the gene
+        trait = people[person]["trait"]
+        for value in (True, False):
+            if trait is not None:
+                probabilities[person]["trait"][value] = 1 if value == trait else 0
+            else:
+                probabilities[person]["trait"][value] = sum(
+                    genes[person][copies] * PROBS["trait"][copies][value]
+                    for copies in (2, 1, 0)
+                )
+    return probabilities
+
+
+def gene_factors(people):
+    """
+    Return one factor per person over their gene count (and their
+    parents' gene counts, if listed): the probability of their gene
+    count given their parents', times the probability of their trait
+    given their gene count if the trait is known.
+    """
+    factors = []
+    for person in people:
+        trait = people[person]["trait"]
+        likelihood = [
+            1 if trait is None else PROBS["trait"][copies][trait]
+            for copies in (0, 1, 2)
+        ]
+        mother, father = people[person]["mother"], people[person]["father"]
+        if mother and father:
+            factors.append(inference.Factor(
+                (person, mother, father), (3, 3, 3),
+                {
+                    (copies, mother_copies, father_copies):
+                        inheritance_probability(copies, mother_copies, father_copies)
+                        * likelihood[copies]
+                    for copies, mother_copies, father_copies
+                    in itertools.product(range(3), repeat=3)
+                }
+            ))
+        else:
+            factors.append(inference.Factor((person,), (3,), {
+                (copies,): PROBS["gene"][copies] * likelihood[copies]
+                for copies in range(3)
+            }))
+    return factors
+
+
+def pass_probability(copies):
+    """
+    Return the probability that a parent with `copies` copies of the
+    gene passes a copy of it (mutated or not) to their child.
+    """
+    if copies == 2:
+        return 1 - PROBS["mutation"]
+    elif copies == 1:
+        return 0.5
+    return PROBS["mutation"]
+
+
+def inheritance_probability(copies, mother_copies, father_copies):
+    """
+    Return the probability that a child has `copies` copies of the gene,
+    given their mother's and father's gene counts.
+    """
+    pass_mother = pass_probability(mother_copies)
+    pass_father = pass_probability(father_copies)
+    if copies == 0:
+        return (1 - pass_mother) * (1 - pass_father)
+    elif copies == 1:
+        return pass_mother * (1 - pass_father) + (1 - pass_mother) * pass_father
+    return pass_mother * pass_father
 
 
 def load_data(filename):
@@ -119,20 +482,118 @@ def load_data(filename):
 
 def powerset(s):
     """
-    Return a list of all possible subsets of set s.
+    Yield all possible subsets of set s, smallest first, one at a time.
     """
     s = list(s)
-    return [
-        set(s) for s in itertools.chain.from_iterable(
-            itertools.combinations(s, r) for r in range(len(s) + 1)
-        )
-    ]
+    for r in range(len(s) + 1):
+        for subset in itertools.combinations(s, r):
+            yield set(subset)
+
+
+def subsets(mask):
+    """
+    Yield every subset of bitmask `mask` as a bitmask, one at a time,
+    from `mask` itself down to 0.
+    """
+    subset = mask
+    while True:
+        yield subset
+        if subset == 0:
+            return
+        subset = (subset - 1) & mask
 
 
-def joint_probability(people, one_gene, two_genes, have_trait):
+def membership(people, one_gene, two_genes, have_trait):
+    """
+    Return (copies, has_trait) lists giving the gene count and trait of
+    every person, in the order of `people`, for sets of names or for
+    bitmasks (bit i standing for the i-th person). `copies` ends with
+    an extra 0 for the phantom parent of factor_tables.
+    """
+    if isinstance(one_gene, int):
+        n = len(people)
+        copies = [
+            1 if one_gene >> i & 1 else 2 if two_genes >> i & 1 else 0
+            for i in range(n)
+        ]
+        has_trait = [have_trait >> i & 1 == 1 for i in range(n)]
+    else:
+        copies = [
+            1 if person in one_gene else 2 if person in two_genes else 0
+            for person in people
+        ]
+        has_trait = [person in have_trait for person in people]
+    copies.append(0)
+    return copies, has_trait
+
+
+def joint_probability(people, one_gene, two_genes, have_trait, tables=None):
     """
     Compute and return a joint probability.
 
+    The probability returned should be the probability that
+        * everyone in set `one_gene` has one copy of the gene, and
+        * everyone in set `two_genes` has two copies of the gene, and
+        * everyone not in `one_gene` or `two_gene` does not have the gene, and
+        * everyone in set `have_trait` has the trait, and
+        * everyone not in set` have_trait` does not have the trait.
+
+    The sets may also be bitmasks (see membership). Each person's factor
+    is looked up in their table (see factor_tables), so the result is
+    the same as direct_joint_probability's. Callers summing over many
+    combinations of the same family should build `tables` once and
+    pass them in.
+    """
+    if tables is None:
+        tables = factor_tables(people)
+    copies, has_trait = membership(people, one_gene, two_genes, have_trait)
+    joint_prob = 1
+    for i, (mother, father, table) in enumerate(tables):
+        joint_prob *= table[(copies[i] * 3 + copies[mother]) * 3 + copies[father]][has_trait[i]]
+    return joint_prob
+
+
+def factor_tables(people):
+    """
+    Return (mother, father, table) for every person, in the order of
+    `people`, where mother and father are the positions of the parents
+    in `people`, and
+    table[(own copies * 3 + mother's copies) * 3 + father's copies][trait]
+    is that person's factor of the joint probability. People without
+    listed parents have a phantom person len(people), always without
+    the gene, as mother and father.
+
+    The tables are worked out from PROBS as they are at the time of
+    the call.
+    """
+    position = {person: i for i, person in enumerate(people)}
+    tables = []
+    for person in people:
+        mother, father = people[person]["mother"], people[person]["father"]
+        listed = bool(mother and father)
+        table = []
+        for copies, mother_copies, father_copies in itertools.product(range(3), repeat=3):
+            if not listed:
+                gene = PROBS["gene"][copies]
+            else:
+                gene = inheritance_probability(copies, mother_copies, father_copies)
+            table.append((
+                gene * PROBS["trait"][copies][False],
+                gene * PROBS["trait"][copies][True]
+            ))
+        if listed:
+            tables.append((position[mother], position[father], table))
+        else:
+            tables.append((len(people), len(people), table))
+
+    return tables
+
+
+def direct_joint_probability(people, one_gene, two_genes, have_trait):
+    """
+    Compute and return a joint probability, as joint_probability does,
+    but working out every factor from PROBS on every call.
+
     The probability returned should be the probability that
         * everyone in set `one_gene` has one copy of the gene, and
         * everyone in set `two_genes` has two copies of the gene, and
@@ -206,11 +667,13 @@ def update(probabilities, one_gene, two_genes, have_trait, p):
     Each person should have their "gene" and "trait" distributions updated.
     Which value for each distribution is updated depends on whether
     the person is in `have_gene` and `have_trait`, respectively.
+    The sets may also be bitmasks (see membership), bit i standing for
+    the i-th person of `probabilities`.
     """
-    for person in probabilities:
-        copies_of_gene = 1 if person in one_gene else 2 if person in two_genes else 0
-        probabilities[person]["gene"][copies_of_gene] += p
-        probabilities[person]["trait"][person in have_trait] += p
+    copies, has_trait = membership(probabilities, one_gene, two_genes, have_trait)
+    for i, person in enumerate(probabilities):
+        probabilities[person]["gene"][copies[i]] += p
+        probabilities[person]["trait"][has_trait[i]] += p
 
 def normalize(probabilities):
     """
@@ -0,0 +1,209 @@
+import itertools
+
+
+class Factor():
+    """
+    Table of non-negative values over every joint assignment of a tuple
+    of discrete `variables`, where variable i takes the values
+    0 to `sizes[i]` - 1. `values` is a dictionary mapping each
+    assignment (a tuple of values, one per variable) to its value.
+    """
+
+    def __init__(self, variables, sizes, values):
+        self.variables = tuple(variables)
+        self.sizes = tuple(sizes)
+        self.values = values
+
+    def assignments(self):
+        """
+        Return an iterator over every assignment of the variables.
+        """
+        return itertools.product(*(range(size) for size in self.sizes))
+
+    def product(self, other):
+        """
+        Return the product of this factor and `other`, over the union
+        of their variables.
+        """
+        sizes = dict(zip(self.variables, self.sizes))
+        sizes.update(zip(other.variables, other.sizes))
+        variables = self.variables + tuple(
+            variable for variable in other.variables if variable not in self.variables
+        )
+        position = {variable: i for i, variable in enumerate(variables)}
+        mine = [position[variable] for variable in self.variables]
+        theirs = [position[variable] for variable in other.variables]
+
+        result = Factor(variables, [sizes[variable] for variable in variables], {})
+        for assignment in result.assignments():
+            result.values[assignment] = (
+                self.values[tuple(assignment[i] for i in mine)]
+                * other.values[tuple(assignment[i] for i in theirs)]
+            )
+        return result
+
+    def marginal(self, variables):
+        """
+        Return the factor over `variables` (a subset of this factor's
+        variables, kept in this factor's order) obtained by summing
+        out every other variable.
+        """
+        keep = [i for i, variable in enumerate(self.variables) if variable in variables]
+        result = Factor(
+            [self.variables[i] for i in keep], [self.sizes[i] for i in keep], {}
+        )
+        for assignment in result.assignments():
+            result.values[assignment] = 0
+        for assignment, value in self.values.items():
+            result.values[tuple(assignment[i] for i in keep)] += value
+        return result
+
+    def normalized(self):
+        """
+        Return this factor scaled so that its values sum to 1
+        (or unchanged if they sum to 0).
+        """
+        total = sum(self.values.values())
+        if total == 0:
+            return self
+        return Factor(self.variables, self.sizes, {
+            assignment: value / total for assignment, value in self.values.items()
+        })
+
+
+def unit(variables, sizes):
+    """
+    Return the factor over `variables` whose values are all 1.
+    """
+    factor = Factor(variables, sizes, {})
+    for assignment in factor.assignments():
+        factor.values[assignment] = 1
+    return factor
+
+
+def marginals(factors):
+    """
+    Return the normalized marginal distribution of every variable of the
+    product of `factors`, as a dictionary mapping each variable to its
+    list of probabilities by value.
+
+    Runs exact sum-product message passing over a junction tree built by
+    eliminating variables (in min-fill order) from the factors' graph:
+    the cost grows with the size of the largest clique, not exponentially
+    with the number of variables. Messages are normalized as they are
+    passed, so that long chains of small probabilities do not underflow.
+    """
+    sizes = {}
+    for factor in factors:
+        sizes.update(zip(factor.variables, factor.sizes))
+
+    cliques, parent = junction_tree(factors)
+
+    # Each factor goes to the clique of its first eliminated variable,
+    # which contains all of its variables
+    potentials = [
+        unit(clique, [sizes[variable] for variable in clique])
+        for clique in cliques
+    ]
+    position = {clique[0]: i for i, clique in enumerate(cliques)}
+    for factor in factors:
+        i = min(position[variable] for variable in factor.variables)
+        potentials[i] = potentials[i].product(factor)
+
+    children = [[] for _ in cliques]
+    for i, j in enumerate(parent):
+        if j is not None:
+            children[j].append(i)
+
+    # Collect: cliques are numbered in elimination order, so every
+    # clique comes before its parent
+    upward = [None] * len(cliques)
+    for i, clique in enumerate(cliques):
+        if parent[i] is None:
+            continue
+        belief = potentials[i]
+        for child in children[i]:
+            belief = belief.product(upward[child])
+        upward[i] = belief.marginal(separator(clique, cliques[parent[i]])).normalized()
+
+    # Distribute, from the roots down
+    downward = [None] * len(cliques)
+    result = {}
+    for i in reversed(range(len(cliques))):
+        incoming = [upward[child] for child in children[i]]
+        if downward[i] is not None:
+            incoming.append(downward[i])
+
+        belief = potentials[i]
+        for message in incoming:
+            belief = belief.product(message)
+        variable = cliques[i][0]
+        marginal = belief.marginal((variable,)).normalized()
+        result[variable] = [marginal.values[(value,)] for value in range(sizes[variable])]
+
+        for child in children[i]:
+            belief = potentials[i]
+            if downward[i] is not None:
+                belief = belief.product(downward[i])
+            for sibling in children[i]:
+                if sibling != child:
+                    belief = belief.product(upward[sibling])
+            downward[child] = belief.marginal(separator(cliques[child], cliques[i])).normalized()
+
+    return result
+
+
+def junction_tree(factors):
+    """
+    Eliminate the variables of `factors` one by one, always picking the
+    variable whose elimination adds the fewest edges between its
+    neighbors (ties broken by fewest neighbors).
+
+    Return (cliques, parent): `cliques[i]` is the tuple of the i-th
+    eliminated variable followed by its neighbors at that point, and
+    `parent[i]` is the index of the clique of the first of those
+    neighbors to be eliminated after it (None for the last clique of
+    each connected component). Together they form a junction tree.
+    """
+    neighbors = {}
+    for factor in factors:
+        for variable in factor.variables:
+            neighbors.setdefault(variable, set()).update(factor.variables)
+    for variable in neighbors:
+        neighbors[variable].discard(variable)
+
+    cliques = []
+    eliminated = {}
+    while neighbors:
+        variable = min(neighbors, key=lambda v: (fill_in(neighbors, v), len(neighbors[v])))
+        around = neighbors.pop(variable)
+        for neighbor in around:
+            neighbors[neighbor].discard(variable)
+            neighbors[neighbor].update(around - {neighbor})
+        eliminated[variable] = len(cliques)
+        cliques.append((variable,) + tuple(around))
+
+    parent = []
+    for clique in cliques:
+        later = [eliminated[variable] for variable in clique[1:]]
+        parent.append(min(later) if later else None)
+    return cliques, parent
+
+
+def fill_in(neighbors, variable):
+    """
+    Return the number of edges eliminating `variable` would add.
+    """
+    around = list(neighbors[variable])
+    return sum(
+        1
+        for a, b in itertools.combinations(around, 2)
+        if b not in neighbors[a]
+    )
+
+
+def separator(clique, other):
+    """
+    Return the variables `clique` shares with `other`.
+    """
+    return tuple(variable for variable in clique if variable in other)
@@ -1,4 +1,5 @@
 import sys
+from collections import Counter, deque
 
 class Node():
     def __init__(self, state, parent, action):
@@ -45,6 +46,49 @@ class QueueFrontier(StackFrontier):
             self.frontier = self.frontier[1:]
             return node
 
+# Same API as StackFrontier, but backed by a deque plus a count of the states
+# it holds => add, remove and contains_state all run in O(1)
+class DequeStackFrontier():
+    def __init__(self):
+        self.frontier = deque()
+        self.states = Counter()
+
+    def add(self, node):
+        self.frontier.append(node)
+        self.states[node.state] += 1
+
+    def contains_state(self, state):
+        return self.states[state] > 0
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    # Remove the last node added (LIFO)
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier.pop()
+            self.discard(node.state)
+            return node
+
+    # Forget one occurrence of a state that left the frontier
+    def discard(self, state):
+        self.states[state] -= 1
+        if self.states[state] == 0:
+            del self.states[state]
+
+# Same API as QueueFrontier, backed by a deque
+class DequeQueueFrontier(DequeStackFrontier):
+    # Remove the first node added (FIFO)
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier.popleft()
+            self.discard(node.state)
+            return node
+
 class Maze():
 
     def __init__(self, filename):
@@ -126,6 +170,7 @@ class Maze():
     # Finds a solution to the maze using search algorithms.
     # If frontier is a StackFrontier, it uses depth-first search.
     # If frontier is a QueueFrontier, it uses breadth-first search.
+    # The Deque* frontiers behave the same, with O(1) add/remove/contains_state.
     def solve(self):
         """Finds a solution to maze, if one exists."""
 
@@ -134,7 +179,7 @@ class Maze():
 
         # Initialize frontier to just the starting position
         start = Node(state=self.start, parent=None, action=None)
-        frontier = StackFrontier() # QueueFrontier()
+        frontier = DequeStackFrontier() # DequeQueueFrontier()
         frontier.add(start)
 
         # Initialize an empty explored set
@@ -0,0 +1,82 @@
+import random
+import sys
+import time
+
+from pagerank import DAMPING, crawl, iterate_pagerank, sample_pagerank, solve_pagerank
+
+# Sample counts timed for sample_pagerank
+SAMPLE_COUNTS = (1000, 10000, 100000, 1000000)
+
+# Threshold of the iteration taken as the exact solution
+EXACT_THRESHOLD = 1e-12
+
+# Link distributions of synthetic corpora
+DISTRIBUTIONS = ("uniform", "power")
+
+
+def main():
+    if len(sys.argv) > 4 or (len(sys.argv) == 4 and sys.argv[3] not in DISTRIBUTIONS):
+        sys.exit("Usage: python benchmark.py [pages [links per page [uniform | power]]]")
+    pages = int(sys.argv[1]) if len(sys.argv) >= 2 else 1000
+    links = int(sys.argv[2]) if len(sys.argv) >= 3 else 5
+    distribution = sys.argv[3] if len(sys.argv) == 4 else "power"
+
+    corpora = [(name, crawl(name, use_index=False)) for name in ("corpus0", "corpus1", "corpus2")]
+    corpora.append((
+        f"synthetic ({pages} pages, {links} {distribution} links)",
+        synthetic_corpus(pages, links, distribution)
+    ))
+
+    for name, corpus in corpora:
+        print(f"{name}: {len(corpus)} pages, "
+              f"{sum(len(links) for links in corpus.values())} links")
+        exact, iterations = solve_pagerank(corpus, DAMPING, threshold=EXACT_THRESHOLD)
+        print(f"  exact solution: {iterations} iterations")
+
+        start = time.perf_counter()
+        ranks = iterate_pagerank(corpus, DAMPING)
+        report("iterate_pagerank", time.perf_counter() - start, ranks, exact)
+
+        for n in SAMPLE_COUNTS:
+            start = time.perf_counter()
+            ranks = sample_pagerank(corpus, DAMPING, n)
+            report(f"sample_pagerank n={n}", time.perf_counter() - start, ranks, exact)
+
+
+def synthetic_corpus(pages, links, distribution="power", seed=0):
+    """
+    Return a random corpus of `pages` pages with `links` links per page
+    on average (fewer once duplicates and self-links are dropped).
+
+    With "uniform" links, every page has between 0 and 2 * `links` links
+    to pages chosen uniformly. With "power" links, the number of links
+    per page follows a Pareto distribution and links go preferentially
+    to low-numbered pages, as on the web: a few hubs, many dangling pages.
+    """
+    rng = random.Random(seed)
+    names = [f"{i}.html" for i in range(pages)]
+    corpus = dict()
+    for i, name in enumerate(names):
+        if distribution == "uniform":
+            count = rng.randint(0, 2 * links)
+            targets = (rng.randrange(pages) for _ in range(count))
+        else:
+            count = int(links / 2 * rng.paretovariate(2)) if rng.random() < 0.9 else 0
+            targets = (int(pages * rng.random() ** 3) for _ in range(min(count, pages)))
+        corpus[name] = {names[j] for j in targets if j != i}
+    return corpus
+
+
+def report(name, seconds, ranks, exact):
+    """
+    Print one timing line with the L1 and largest errors of `ranks`
+    against the `exact` ranks.
+    """
+    l1 = sum(abs(ranks[page] - exact[page]) for page in exact)
+    worst = max(abs(ranks[page] - exact[page]) for page in exact)
+    print(f"  {name:<26} {seconds * 1000:>10.1f} ms"
+          f"   L1 error {l1:.2e}   max error {worst:.2e}")
+
+
+if __name__ == "__main__":
+    main()
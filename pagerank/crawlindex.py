@@ -0,0 +1,98 @@
+import os
+import pickle
+from array import array
+
+# Bump VERSION whenever the layout below changes => older indexes go stale
+VERSION = 1
+FILENAME = "pagerank.index"
+RANKS_FILENAME = "pagerank.ranks"
+
+# Layout (pickled):
+#   (VERSION, names, files)
+#   names => list of every distinct filename and link target
+#   files => {filename: (size, mtime_ns, digest, array of link name ids)}
+
+
+def read(directory):
+    """
+    Return the crawl index of `directory` as a dictionary mapping each
+    indexed filename to (size, mtime_ns, digest, links), where `links`
+    is the set of link targets found in the file when it was parsed.
+
+    Returns an empty dictionary if there is no index, or if it is
+    unreadable or was written by another version.
+    """
+    data = load(os.path.join(directory, FILENAME))
+    if not isinstance(data, tuple) or len(data) != 3 or data[0] != VERSION:
+        return {}
+    _, names, files = data
+    return {
+        filename: (size, mtime_ns, digest, {names[i] for i in links})
+        for filename, (size, mtime_ns, digest, links) in files.items()
+    }
+
+
+def write(directory, index):
+    """
+    Write crawl index `index` (as returned by `read`) into `directory`.
+    Every filename and link target is stored once, links as arrays of
+    ids into that table.
+    """
+    names = []
+    ids = {}
+    files = {}
+    for filename, (size, mtime_ns, digest, links) in index.items():
+        link_ids = array("i")
+        for link in links:
+            if link not in ids:
+                ids[link] = len(names)
+                names.append(link)
+            link_ids.append(ids[link])
+        files[filename] = (size, mtime_ns, digest, link_ids)
+    dump(os.path.join(directory, FILENAME), (VERSION, names, files))
+
+
+def read_ranks(directory):
+    """
+    Return the rank of every page from the last run over `directory`,
+    or None if there is none.
+    """
+    ranks = load(os.path.join(directory, RANKS_FILENAME))
+    return ranks if isinstance(ranks, dict) else None
+
+
+def write_ranks(directory, ranks):
+    """
+    Save the rank of every page, to warm-start the next run.
+    """
+    dump(os.path.join(directory, RANKS_FILENAME), dict(ranks))
+
+
+def load(path):
+    """
+    Return the object pickled at `path`, or None if it cannot be read.
+    """
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        return None
+
+
+def dump(path, data):
+    """
+    Pickle `data` to `path`.
+    Failing to write (e.g. read-only directory) is not an error:
+    the next run simply parses the files again.
+    """
+    # Write to a temporary file first so readers never see a partial file
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+    except OSError:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
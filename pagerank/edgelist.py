@@ -0,0 +1,334 @@
+import heapq
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from pagerank import DAMPING
+
+# Bump VERSION whenever the index layout below changes
+MAGIC = b"PRGRAPH\0"
+VERSION = 1
+
+# Edge list file: raw (source, target) pairs of native uint32 page ids.
+#
+# Index file, built from an edge list (native byte order):
+#   magic, version, byte order, page count N, edge count E
+#   out_degree => N uint32, links of every page
+#   offsets    => N + 1 uint64, padded to 8 bytes
+#   sources    => E uint32, pages linking to page p at
+#                 sources[offsets[p]:offsets[p + 1]]
+#
+# Rank file: N native doubles, the rank of every page by id.
+HEADER = struct.Struct("=8sIcxxxQQ")
+EDGE = "I"
+
+# Edges read from an edge list at a time
+CHUNK_EDGES = 1 << 20
+
+# Pages updated at a time during an iteration
+CHUNK_PAGES = 1 << 16
+
+# Highest ranked pages printed by main
+TOP = 10
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python edgelist.py edges [ranks]")
+    edges = sys.argv[1]
+    ranks = sys.argv[2] if len(sys.argv) == 3 else f"{edges}.ranks"
+
+    # Rebuild the index whenever the edge list is newer
+    index = f"{edges}.index"
+    if not os.path.exists(index) or os.path.getmtime(index) < os.path.getmtime(edges):
+        build_index(edges, index)
+
+    iterations = pagerank(index, ranks, DAMPING)
+    print(f"PageRank Results from Iteration ({iterations} iterations), top {TOP} pages")
+    view = read_ranks(ranks)
+    for page in heapq.nlargest(TOP, range(len(view)), key=view.__getitem__):
+        print(f"  {page}: {view[page]:.4f}")
+
+
+def write_corpus(corpus, path):
+    """
+    Write the links of `corpus` (as returned by crawl) to edge list
+    `path`, numbering pages in sorted order. Return the list of pages
+    by id.
+    """
+    pages = sorted(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+    write_edges(path, (
+        (index[page], index[link])
+        for page in pages
+        for link in corpus[page]
+    ))
+    return pages
+
+
+def write_edges(path, edges):
+    """
+    Write an iterable of (source, target) page id pairs to edge list `path`.
+    """
+    with open(path, "wb") as f:
+        chunk = array(EDGE)
+        for source, target in edges:
+            chunk.append(source)
+            chunk.append(target)
+            if len(chunk) >= 2 * CHUNK_EDGES:
+                chunk.tofile(f)
+                del chunk[:]
+        chunk.tofile(f)
+
+
+def build_index(edges_path, index_path, size=None):
+    """
+    Build the index of edge list `edges_path` into `index_path`.
+
+    Edges are only ever read CHUNK_EDGES at a time, and sorted by target
+    (a counting sort) straight into the memory-mapped index, so that only
+    per-page arrays are held in memory. Pages are numbered 0 to `size` - 1,
+    `size` defaulting to one more than the largest id in the edge list.
+    Edges are counted as given: to rank like iterate_pagerank, list
+    every link once and leave out links from a page to itself.
+    """
+    with open(edges_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            edges = memoryview(b"").cast(EDGE)
+            data = None
+        else:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            edges = memoryview(data).cast(EDGE)
+
+    if size is None:
+        size = max(map(max, chunks(edges)), default=-1) + 1
+
+    # Links out of and into every page
+    out_degree, offsets = count_links(edges, size)
+    count = offsets[size]
+
+    # Write the per-page arrays, then sort every source into its
+    # target's row of the memory-mapped index
+    with open(index_path, "w+b") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, sys.byteorder[0].encode(), size, count))
+        f.write(out_degree)
+        f.write(b"\0" * (-f.tell() % 8))
+        f.write(offsets)
+        start = f.tell()
+        f.truncate(start + count * out_degree.itemsize)
+        index = mmap.mmap(f.fileno(), 0)
+
+    sources = memoryview(index)[start:].cast(EDGE)
+    scatter(edges, sources, array("Q", offsets[:size]))
+
+    sources.release()
+    index.close()
+    edges.release()
+    if data is not None:
+        data.close()
+
+
+def count_links(edges, size):
+    """
+    Return (out_degree, offsets) arrays for `edges`: the number of links
+    out of every page, and where each page's incoming links start in
+    the sorted sources (cumulative in-degrees).
+    """
+    out_degree = array(EDGE, [0]) * size
+    offsets = array("Q", [0]) * (size + 1)
+    for chunk in chunks(edges):
+        for source, target in zip(chunk[0::2], chunk[1::2]):
+            out_degree[source] += 1
+            offsets[target + 1] += 1
+    for p in range(size):
+        offsets[p + 1] += offsets[p]
+    return out_degree, offsets
+
+
+def scatter(edges, sources, fill):
+    """
+    Write the source of every edge of `edges` into `sources`, at the
+    next free position `fill` of its target's row.
+    """
+    for chunk in chunks(edges):
+        for source, target in zip(chunk[0::2], chunk[1::2]):
+            sources[fill[target]] = source
+            fill[target] += 1
+
+
+def chunks(edges):
+    """
+    Yield memoryviews over successive CHUNK_EDGES edges of `edges`.
+    """
+    for start in range(0, len(edges), 2 * CHUNK_EDGES):
+        yield edges[start:start + 2 * CHUNK_EDGES]
+
+
+def open_index(path):
+    """
+    Memory-map index `path` and return (data, out_degree, offsets,
+    sources): the mmap and read-only memoryviews over its arrays.
+    Raises ValueError if the file is not an index of this version.
+    """
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, byteorder, size, count = HEADER.unpack_from(data)
+    if (magic != MAGIC or version != VERSION
+            or byteorder != sys.byteorder[0].encode()):
+        data.close()
+        raise ValueError(f"{path} is not a PageRank index of this version")
+
+    view = memoryview(data)
+    offset = HEADER.size
+    out_degree = view[offset:offset + 4 * size].cast(EDGE)
+    offset += 4 * size
+    offset += -offset % 8
+    offsets = view[offset:offset + 8 * (size + 1)].cast("Q")
+    offset += 8 * (size + 1)
+    sources = view[offset:offset + 4 * count].cast(EDGE)
+    return data, out_degree, offsets, sources
+
+
+def pagerank(index_path, rank_path, damping_factor, threshold=0.001):
+    """
+    Rank the pages of index `index_path` like iterate_pagerank, keeping
+    the graph and the rank vectors on disk, and write the ranks into
+    rank file `rank_path`. Return the number of iterations.
+
+    Each iteration reads the graph CHUNK_PAGES pages at a time, so memory
+    use stays bounded however large the graph is. Like power_iteration,
+    the ranks written are the last iterate before the first update that
+    changes no page's rank by `threshold` or more.
+    """
+    data, out_degree, offsets, sources = open_index(index_path)
+    N = len(out_degree)
+    if N == 0:
+        for view in (out_degree, offsets, sources):
+            view.release()
+        data.close()
+        raise ValueError(f"{index_path} has no pages to rank")
+
+    # Current and next rank vectors, and rank passed along each link
+    files = [f"{rank_path}.{name}.tmp" for name in ("rank", "new", "share")]
+    buffers = []
+    views = []
+    done = False
+    try:
+        for path in files:
+            buffers.append(vector_file(path, N))
+            views.append(memoryview(buffers[-1])[:8 * N].cast("d"))
+        rank, new, share = views
+
+        for a, b in page_chunks(N):
+            rank[a:b] = array("d", [1 / N]) * (b - a)
+
+        iterations = 0
+        while True:
+            dangling_rank = spread(rank, out_degree, share)
+            base = (1 - damping_factor) / N + damping_factor * dangling_rank / N
+            change = update(rank, new, share, offsets, sources, base, damping_factor)
+            iterations += 1
+            if change < threshold:
+                break
+            rank, new = new, rank
+            files[0], files[1] = files[1], files[0]
+        done = True
+    finally:
+        for view in views + [out_degree, offsets, sources]:
+            view.release()
+        for buffer in buffers + [data]:
+            try:
+                buffer.close()
+            except BufferError:
+                # A traceback still holds slices of it in the frames of
+                # spread or update: it is unmapped once they are freed
+                pass
+
+        # Never leave temporary files behind, even on error
+        if not done:
+            for path in files:
+                remove(path)
+
+    try:
+        os.replace(files[0], rank_path)
+    finally:
+        for path in files:
+            remove(path)
+    return iterations
+
+
+def remove(path):
+    """
+    Delete file `path` if it exists.
+    """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def spread(rank, out_degree, share):
+    """
+    Fill `share` with the rank each page passes along each of its links,
+    and return the total rank of pages without links.
+    """
+    dangling_rank = 0.0
+    for a, b in page_chunks(len(rank)):
+        ranks, degrees = rank[a:b], out_degree[a:b]
+        share[a:b] = array("d", [
+            r / degree if degree else 0.0
+            for r, degree in zip(ranks, degrees)
+        ])
+        dangling_rank += sum(r for r, degree in zip(ranks, degrees) if not degree)
+    return dangling_rank
+
+
+def update(rank, new, share, offsets, sources, base, damping_factor):
+    """
+    Fill `new` with the PageRank update of `rank` (whose `share` along
+    each link is filled in), and return the largest change of any page.
+    """
+    get = share.__getitem__
+    change = 0.0
+    for a, b in page_chunks(len(rank)):
+        values = array("d", [
+            base + damping_factor * sum(map(get, sources[offsets[p]:offsets[p + 1]]))
+            for p in range(a, b)
+        ])
+        new[a:b] = values
+        change = max(change, max(abs(x - y) for x, y in zip(values, rank[a:b])))
+    return change
+
+
+def vector_file(path, size):
+    """
+    Create a file with room for `size` doubles at `path` and return
+    a writable mmap of it.
+    """
+    with open(path, "w+b") as f:
+        f.truncate(max(size, 1) * 8)
+        return mmap.mmap(f.fileno(), 0)
+
+
+def page_chunks(size):
+    """
+    Yield (start, end) bounds of successive CHUNK_PAGES pages.
+    """
+    for start in range(0, size, CHUNK_PAGES):
+        yield start, min(start + CHUNK_PAGES, size)
+
+
+def read_ranks(path):
+    """
+    Return a read-only memoryview of the doubles in rank file `path`.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return memoryview(b"").cast("d")
+        return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)).cast("d")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,56 +1,182 @@
+import codecs
+import hashlib
+import locale
+import multiprocessing
 import os
 import random
 import re
 import sys
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice, repeat
+
+import crawlindex
 
 DAMPING = 0.85
 SAMPLES = 10000
 
+# Matches the target of every <a ... href="..."> link
+LINK_PATTERN = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# Bytes read from an HTML file at a time
+CHUNK_SIZE = 1 << 16
+
+# Longest unfinished link tag (in characters) carried between chunks
+MAX_CARRY = 4096
+
+# Size in bytes of the content digests kept in the crawl index
+DIGEST_SIZE = 16
+
+# Files handed to the crawl pool at a time
+CRAWL_BATCH = 4096
+
+# Iterations between two Aitken extrapolations
+AITKEN_PERIOD = 10
+
+# Teleport vectors iterated together by personalized_pagerank
+PERSONALIZED_BLOCK = 32
+
 
 def main():
     if len(sys.argv) != 2:
         sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
+    corpus = crawl(sys.argv[1], workers=os.cpu_count() or 1)
     
     ranks = sample_pagerank(corpus, DAMPING, SAMPLES) # Random Surfer Model
     print(f"PageRank Results from Sampling (n = {SAMPLES})")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
     
-    ranks = iterate_pagerank(corpus, DAMPING) # Iterative Algorithm
-    print(f"PageRank Results from Iteration")
+    # Iterative Algorithm, warm-started from the ranks of the last run
+    start = crawlindex.read_ranks(sys.argv[1])
+    ranks, iterations = solve_pagerank(corpus, DAMPING, start)
+    print(f"PageRank Results from Iteration ({iterations} iterations)")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
+    crawlindex.write_ranks(sys.argv[1], ranks)
 
 
-def crawl(directory):
+def crawl(directory, workers=1, processes=False, use_index=True):
     """
     Parse a directory of HTML pages and check for links to other pages.
     Return a dictionary where each key is a page, and values are
     a list of all other pages in the corpus that are linked to by the page.
+
+    With `workers` > 1, files are read and parsed in parallel by a pool
+    of that many threads (or processes, if `processes` is True).
+
+    With `use_index`, the links found in every file are saved to an index
+    in `directory`, and later crawls only parse the files that changed.
     """
-    pages = dict()
+    index = crawlindex.read(directory) if use_index else {}
+    files = dict()
 
-    # Extract all links from HTML files
-    for filename in os.listdir(directory):
-        if not filename.endswith(".html"):
+    # Reuse the links of files unchanged since the last crawl
+    stale = []
+    for entry in os.scandir(directory):
+        if not entry.name.endswith(".html"):
             continue
-        with open(os.path.join(directory, filename)) as f:
-            contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
+        stat = entry.stat()
+        known = index.get(entry.name)
+        if known is not None and known[:2] == (stat.st_size, stat.st_mtime_ns):
+            files[entry.name] = known
+        else:
+            stale.append((entry.name, stat, known))
+
+    # Extract all links from new and changed HTML files
+    for (filename, stat, known), (digest, links) in zip(
+        stale, extract_all(directory, stale, workers, processes)
+    ):
+        # Touched but identical files are not parsed again
+        if links is None:
+            links = known[3]
+        files[filename] = (stat.st_size, stat.st_mtime_ns, digest, links)
+
+    if use_index and (stale or len(files) != len(index)):
+        crawlindex.write(directory, files)
 
     # Only include links to other pages in the corpus
-    for filename in pages:
+    pages = dict()
+    for filename, (_, _, _, links) in files.items():
         pages[filename] = set(
-            link for link in pages[filename] 
-            if link in pages
+            link for link in links
+            if link in files and link != filename
         )
 
     return pages
 
 
-def transition_model(corpus, page, damping_factor):
+def extract_all(directory, stale, workers=1, processes=False):
+    """
+    Yield scan_page's (digest, links) for every (filename, stat, known)
+    of `stale` in `directory`, in order.
+
+    Files are handed to the pool CRAWL_BATCH at a time, so only that many
+    are ever queued or held in memory at once.
+    """
+    jobs = (
+        (os.path.join(directory, filename), None if known is None else known[2])
+        for filename, _, known in stale
+    )
+    if workers <= 1:
+        for path, digest in jobs:
+            yield scan_page(path, digest)
+        return
+
+    pool = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with pool(workers) as executor:
+        while batch := list(islice(jobs, CRAWL_BATCH)):
+            yield from executor.map(scan_page, *zip(*batch), chunksize=64)
+
+
+def scan_page(path, digest=None):
+    """
+    Return (digest, links) for the HTML file at `path`.
+    If the file content still has digest `digest`, it is not parsed
+    and `links` is None.
+    """
+    if digest is not None:
+        hasher = hashlib.blake2b(digest_size=DIGEST_SIZE)
+        with open(path, "rb") as f:
+            while chunk := f.read(CHUNK_SIZE):
+                hasher.update(chunk)
+        if hasher.digest() == digest:
+            return digest, None
+    return extract_links(path)
+
+
+def extract_links(path):
+    """
+    Return (digest, links) for the HTML file at `path`: the blake2b
+    digest of its content and the set of its link targets.
+
+    The file is read CHUNK_SIZE bytes at a time. A link tag still open
+    at the end of a chunk (its last "<a" without a ">" after it, or a
+    trailing "<") is carried over to the next chunk, so a link split
+    across two chunks is still found; carried text longer than
+    MAX_CARRY characters is no link tag and is dropped.
+    """
+    hasher = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    decoder = codecs.getincrementaldecoder(locale.getpreferredencoding(False))()
+    links = set()
+    carry = ""
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            hasher.update(chunk)
+            text = carry + decoder.decode(chunk)
+            cut = text.rfind("<a")
+            if cut == -1 or text.find(">", cut) != -1:
+                cut = len(text) - text.endswith("<")
+            for match in LINK_PATTERN.finditer(text, 0, cut):
+                links.add(match.group(1))
+            carry = text[cut:] if len(text) - cut <= MAX_CARRY else ""
+    carry += decoder.decode(b"", final=True)
+    links.update(LINK_PATTERN.findall(carry))
+    return hasher.digest(), links
+
+
+def transition_model(corpus, page, damping_factor, teleport=None):
     """
     Return a probability distribution over which page to visit next,
     given a current page.
@@ -58,7 +184,21 @@ def transition_model(corpus, page, damping_factor):
     With probability `damping_factor`, choose a link at random
     linked to by `page`. With probability `1 - damping_factor`, choose
     a link at random chosen from all pages in the corpus.
+
+    If `teleport` is given (see teleport_vector), random jumps, and
+    every move from a page without links, follow that distribution
+    over pages instead of choosing uniformly.
     """
+    if teleport is not None:
+        jump = dict(zip(sorted(corpus), teleport_vector(corpus, teleport)))
+        output = {website: (1 - damping_factor) * jump[website] for website in corpus}
+        if corpus[page]:
+            for website in corpus[page]:
+                output[website] += damping_factor / len(corpus[page])
+        else:
+            for website in corpus:
+                output[website] += damping_factor * jump[website]
+        return output
 
     output = dict()
     pages_num = len(corpus)    
@@ -77,46 +217,95 @@ def transition_model(corpus, page, damping_factor):
     return output
 
 
-def sample_pagerank(corpus, damping_factor, n):
+def sample_pagerank(corpus, damping_factor, n, surfers=1, workers=None):
     """
     Return PageRank values for each page by sampling `n` pages
     according to transition model, starting with a page at random.
 
+    With `surfers` > 1, split the `n` samples between that many
+    independent random surfers, run in batches over a pool of `workers`
+    processes (by default, as many as there are CPUs, but no more than
+    there are surfers).
+
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    
-    # Initialize a counter
-    counter = {page: 0 for page in corpus}
-    
-    # Choose a starting page
-    current_page = random.choice(list(corpus.keys()))
-
-    # Simulate the random surfer
-    n_steps = n
-    while n_steps > 0:
-        probabilities = transition_model(corpus, current_page, damping_factor)
-        population = list(probabilities.keys())
-        weights = list(probabilities.values())
-        next_page = random.choices(
-                                    population= population,
-                                    weights= weights,
-                                    k=1
-                                ) # return a list with 1 element
-        counter[next_page[0]] += 1
-        current_page = next_page[0]
-        n_steps -= 1
+    pages = list(corpus)
+    links = out_links(corpus, pages)
+
+    if surfers > 1:
+        # Every surfer gets its own seed and its share of the samples
+        steps = [n // surfers + (i < n % surfers) for i in range(surfers)]
+        seeds = [random.getrandbits(64) for _ in range(surfers)]
+
+        # One batch of consecutive surfers per worker
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, surfers))
+        size = -(-surfers // workers)
+        batches = [
+            (links, damping_factor, steps[i:i + size], seeds[i:i + size])
+            for i in range(0, surfers, size)
+        ]
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.starmap(surf_batch, batches)
+        counts = [sum(column) for column in zip(*results)]
+    else:
+        counts = surf(links, damping_factor, n)
 
     # Normalize the counts
-    for page in counter:
-        counter[page] /= n
-    
-    # Return the result
-    return counter
+    return {page: count / n for page, count in zip(pages, counts)}
+
+
+def surf_batch(links, damping_factor, steps, seeds):
+    """
+    Run one surfer per (steps, seed) pair of `steps` and `seeds` (see
+    surf), and return their visit counts added up.
+    """
+    counts = [0] * len(links)
+    for n, seed in zip(steps, seeds):
+        counts = [a + b for a, b in zip(counts, surf(links, damping_factor, n, seed))]
+    return counts
+
+
+def out_links(corpus, pages):
+    """
+    Return, for each page of `pages` (by position), an array of the
+    positions of the pages it links to.
+    """
+    index = {page: i for i, page in enumerate(pages)}
+    return [array("i", sorted(index[link] for link in corpus[page])) for page in pages]
+
+
+def surf(links, damping_factor, n, seed=None):
+    """
+    Simulate a random surfer for `n` steps over pages numbered by
+    position in `links`, starting on a random page, and return how many
+    times each page was visited.
+
+    Each step is O(1): with probability `damping_factor` follow one of the
+    current page's links, otherwise (or if it has none) jump to any page,
+    which gives the same distribution as transition_model.
+    """
+    rand = random.Random(seed).random if seed is not None else random.random
+    N = len(links)
+    counts = [0] * N
+
+    current = int(rand() * N)
+    for _ in range(n):
+        page_links = links[current]
+        if page_links and rand() < damping_factor:
+            current = page_links[int(rand() * len(page_links))]
+        else:
+            current = int(rand() * N)
+        counts[current] += 1
+
+    return counts
 
 
-def iterate_pagerank(corpus, damping_factor):
+def iterate_pagerank(corpus, damping_factor, start=None, method="jacobi",
+                     norm="inf", threshold=0.001):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
@@ -124,45 +313,349 @@ def iterate_pagerank(corpus, damping_factor):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    See solve_pagerank for the optional arguments.
     """
-    
-    N = len(corpus)
-    d = damping_factor
-    threshold = 0.001
-
-    # starting state: each page's rank is equally assigned 1/N
-    page_rank = {page: 1/N for page in corpus}
-
-    #----- PageRank Update ----#
-    while True:       
-        new_rank = {} 
-        for p in corpus:
-            sum_page_i = 0
-            for i in corpus:
-                # If page i links to p, add its share
-                if p in corpus[i]:
-                    sum_page_i += page_rank[i] / len(corpus[i])
-                # If page i has no outgoing links, treat it as linking to all pages
-                if len(corpus[i]) == 0:
-                    sum_page_i += page_rank[i] / N
-
-            new_rank[p] = (1-d) / N + d * sum_page_i 
-            
-        #----- Convergence Check ----#
-        '''
-        differences = [abs(new_rank[p] - page_rank[p]) for p in corpus] 
-        if max(differences) < threshold:
-            break
-        '''
-        
-        if all(abs(new_rank[p] - page_rank[p]) < threshold for p in corpus):
-             break # Stop the loop
-        
-        #----- Update Values ----#
+    return solve_pagerank(corpus, damping_factor, start, method, norm, threshold)[0]
+
+
+def solve_pagerank(corpus, damping_factor, start=None, method="jacobi",
+                   norm="inf", threshold=0.001):
+    """
+    Return (ranks, iterations): the PageRank dictionary of `corpus`
+    and the number of iterations it took to converge.
+
+    `start` optionally maps pages to their rank from an earlier run
+    (warm start); `method` is "jacobi", "gauss-seidel" or "aitken";
+    iteration stops once the `norm` ("l1" or "inf") of the change
+    between two iterates falls below `threshold`.
+    """
+    pages, matrix = link_matrix(corpus)
+    if start is not None:
+        start = [start.get(page, 1 / len(pages)) for page in pages]
+    page_rank, iterations = power_iteration(
+        matrix, damping_factor, threshold, start, method, norm
+    )
+    return dict(zip(pages, page_rank)), iterations
+
+
+def personalized_pagerank(corpus, damping_factor, teleports, threshold=0.001):
+    """
+    Return the personalized PageRank of `corpus` for every teleport
+    distribution of `teleports`, as a list of rank dictionaries in the
+    same order.
+
+    Each teleport (see teleport_vector) replaces the uniform random jump
+    of iterate_pagerank; pages without links also jump along it. Up to
+    PERSONALIZED_BLOCK teleports are iterated together as one block, so
+    that the links are walked once per iteration for the whole block.
+    """
+    pages, matrix = link_matrix(corpus)
+    ranks = []
+    teleports = iter(teleports)
+    while block := list(islice(teleports, PERSONALIZED_BLOCK)):
+        vectors = [teleport_vector(corpus, teleport) for teleport in block]
+        for rank in block_iteration(matrix, damping_factor, vectors, threshold):
+            ranks.append(dict(zip(pages, rank)))
+    return ranks
+
+
+def teleport_vector(corpus, teleport):
+    """
+    Return `teleport` as a probability list over the sorted pages of
+    `corpus`. A teleport is either a dictionary mapping pages to
+    (non-negative) weights, or a collection of pages weighted equally.
+    """
+    if not isinstance(teleport, dict):
+        teleport = dict.fromkeys(teleport, 1)
+    weights = [teleport.get(page, 0) for page in sorted(corpus)]
+    total = sum(weights)
+    if total <= 0 or any(weight < 0 for weight in weights):
+        raise ValueError("teleport needs a positive weight on some page of the corpus")
+    return [weight / total for weight in weights]
+
+
+def block_iteration(matrix, damping_factor, teleports, threshold=0.001):
+    """
+    Run the personalized power iteration of every teleport list of
+    `teleports` together, each starting from its teleport list, and
+    return their rank lists. Like power_iteration, each rank list is its
+    last iterate before a sub-threshold (L-infinity) update; converged
+    lists leave the block.
+    """
+    ranks = [list(teleport) for teleport in teleports]
+    active = list(range(len(teleports)))
+    while active:
+        updates = matrix.multiply_block(
+            [ranks[j] for j in active], damping_factor, [teleports[j] for j in active]
+        )
+        still_active = []
+        for j, new_rank in zip(active, updates):
+            if max_change(new_rank, ranks[j]) >= threshold:
+                ranks[j] = new_rank
+                still_active.append(j)
+        active = still_active
+    return ranks
+
+
+def local_pagerank(corpus, damping_factor, seed, epsilon=1e-6):
+    """
+    Approximate the personalized PageRank of `corpus` for random jumps
+    to page `seed` alone, by pushing probability mass out from `seed`
+    (as in Andersen, Chung and Lang's local PageRank). Only pages near
+    `seed` are ever touched, so the cost does not depend on the size of
+    the corpus.
+
+    Return a dictionary of the pages reached and their estimated ranks
+    (pages not returned have an estimated rank of 0). Pushing stops once
+    every page holds less than `epsilon` times its number of links
+    (at least 1) of unpushed mass; estimates never exceed the exact
+    ranks, and fall short of them by 1 - sum(estimates) in total.
+    """
+    if seed not in corpus:
+        raise ValueError(f"unknown seed page {seed!r}")
+    estimate = dict()
+    residual = {seed: 1.0}
+    queue = deque([seed])
+    while queue:
+        page = queue.popleft()
+        mass = residual.pop(page)
+        estimate[page] = estimate.get(page, 0.0) + (1 - damping_factor) * mass
+
+        # Pages without links jump back to the seed
+        links = corpus[page] or (seed,)
+        share = damping_factor * mass / len(links)
+        for link in links:
+            before = residual.get(link, 0.0)
+            residual[link] = before + share
+            limit = epsilon * max(len(corpus[link]), 1)
+            if before < limit <= before + share:
+                queue.append(link)
+
+    return estimate
+
+
+def link_matrix(corpus):
+    """
+    Build the sparse column-stochastic link matrix of `corpus`.
+
+    Pages are numbered in sorted order. Return (pages, matrix) where
+    `pages` lists page names by number and `matrix` is a LinkMatrix.
+    """
+    pages = sorted(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+
+    # Incoming links of every page, as CSR arrays (row = linked-to page)
+    counts = array("q", [0]) * (len(pages) + 1)
+    for page in pages:
+        for link in corpus[page]:
+            counts[index[link] + 1] += 1
+    for i in range(len(pages)):
+        counts[i + 1] += counts[i]
+
+    sources = array("i", [0]) * counts[-1]
+    fill = array("q", counts)
+    out_degree = array("i", [0]) * len(pages)
+    for i, page in enumerate(pages):
+        out_degree[i] = len(corpus[page])
+        for link in corpus[page]:
+            j = index[link]
+            sources[fill[j]] = i
+            fill[j] += 1
+
+    return pages, LinkMatrix(counts, sources, out_degree)
+
+
+class LinkMatrix():
+    """
+    Column-stochastic link matrix in CSR form: page `p` is linked to by
+    pages `sources[offsets[p]:offsets[p + 1]]`, and page `i` spreads its
+    rank evenly over its `out_degree[i]` links. Pages with no links
+    (dangling pages) spread their rank over every page.
+    """
+
+    def __init__(self, offsets, sources, out_degree):
+        self.offsets = offsets
+        self.sources = sources
+        self.out_degree = out_degree
+        self.dangling = [i for i, degree in enumerate(out_degree) if degree == 0]
+
+    def __len__(self):
+        return len(self.out_degree)
+
+    def multiply_block(self, ranks, damping_factor, teleports):
+        """
+        Return one personalized PageRank update of every rank list of
+        `ranks`: (1 - d) * v + d * (M @ rank), where v is the matching
+        teleport list of `teleports`, and dangling pages link along v.
+        """
+        N = len(self)
+        offsets, sources = self.offsets, self.sources
+
+        jumps = []
+        for rank in ranks:
+            dangling_rank = sum(rank[i] for i in self.dangling)
+            jumps.append(1 - damping_factor + damping_factor * dangling_rank)
+
+        # Rank lists are packed two to a list of complex numbers (as real
+        # and imaginary parts), so that every sum over a page's links
+        # adds up two of them at once
+        gets = []
+        for j in range(0, len(ranks), 2):
+            second = ranks[j + 1] if j + 1 < len(ranks) else repeat(0.0)
+            share = [
+                complex(x, y) / degree if degree else 0j
+                for x, y, degree in zip(ranks[j], second, self.out_degree)
+            ]
+            gets.append(share.__getitem__)
+
+        # Rank flowing into each page, one row of the whole block per page
+        rows = [
+            [sum(map(get, linked), 0j) for get in gets]
+            for linked in (sources[offsets[p]:offsets[p + 1]] for p in range(N))
+        ]
+        columns = []
+        for column in zip(*rows):
+            columns.append([z.real for z in column])
+            columns.append([z.imag for z in column])
+
+        return [
+            [jump * v + damping_factor * x for x, v in zip(column, teleport)]
+            for column, jump, teleport in zip(columns, jumps, teleports)
+        ]
+
+    def sweep(self, rank, damping_factor):
+        """
+        Return one Gauss-Seidel update of `rank`: like `multiply`, except
+        that pages are updated in order and each new rank is passed along
+        right away to the pages updated after it. The dangling rank is
+        taken from `rank`, and the result is renormalized to sum to 1.
+        """
+        N = len(self)
+        offsets, sources, out_degree = self.offsets, self.sources, self.out_degree
+
+        rank = list(rank)
+        share = [
+            r / degree if degree else 0.0
+            for r, degree in zip(rank, out_degree)
+        ]
+        dangling_rank = sum(rank[i] for i in self.dangling)
+        base = (1 - damping_factor) / N + damping_factor * dangling_rank / N
+
+        get = share.__getitem__
+        for p in range(N):
+            r = base + damping_factor * sum(map(get, sources[offsets[p]:offsets[p + 1]]))
+            rank[p] = r
+            if out_degree[p]:
+                share[p] = r / out_degree[p]
+
+        total = sum(rank)
+        return [r / total for r in rank]
+
+    def multiply(self, rank, damping_factor):
+        """
+        Return one PageRank update of `rank`:
+        (1 - d) / N + d * (M @ rank), with dangling pages linking to all pages.
+        """
+        N = len(self)
+        offsets, sources = self.offsets, self.sources
+
+        # Rank each page passes along each of its links
+        share = [
+            r / degree if degree else 0.0
+            for r, degree in zip(rank, self.out_degree)
+        ]
+        dangling_rank = sum(rank[i] for i in self.dangling)
+        base = (1 - damping_factor) / N + damping_factor * dangling_rank / N
+
+        get = share.__getitem__
+        return [
+            base + damping_factor * sum(map(get, sources[offsets[p]:offsets[p + 1]]))
+            for p in range(N)
+        ]
+
+
+def power_iteration(matrix, damping_factor, threshold=0.001, start=None,
+                    method="jacobi", norm="inf"):
+    """
+    Iterate PageRank updates of `matrix` until the `norm` of the change
+    between two iterates is below `threshold`, and return (rank list,
+    iterations), the rank list being the last iterate before that final,
+    sub-threshold update.
+
+    Iteration starts from the uniform vector, or from the (renormalized)
+    rank list `start`. Methods:
+        "jacobi"        plain power iteration
+        "gauss-seidel"  in-place sweeps, see LinkMatrix.sweep
+        "aitken"        power iteration with an Aitken extrapolation
+                        every AITKEN_PERIOD iterations, once the
+                        iterates converge at a steady rate
+    """
+    if method not in METHODS:
+        raise ValueError(f"unknown method {method!r}")
+    if norm not in NORMS:
+        raise ValueError(f"unknown norm {norm!r}")
+    change = NORMS[norm]
+    N = len(matrix)
+
+    page_rank = [1 / N] * N
+    if start is not None and sum(start) > 0:
+        total = sum(start)
+        page_rank = [r / total for r in start]
+
+    update = matrix.sweep if method == "gauss-seidel" else matrix.multiply
+    history = []
+    iterations = 0
+    while True:
+        new_rank = update(page_rank, damping_factor)
+        iterations += 1
+        if change(new_rank, page_rank) < threshold:
+            return page_rank, iterations
+
+        # Extrapolating before the iterates converge geometrically
+        # (at a steady rate) would throw them off instead
+        if method == "aitken":
+            history = (history + [page_rank])[-3:]
+            if iterations % AITKEN_PERIOD == 0 and len(history) == 3:
+                x0, x1, x2 = history
+                rate = l1_change(new_rank, x2) / l1_change(x2, x1)
+                if abs(rate - l1_change(x2, x1) / l1_change(x1, x0)) < 0.01 * rate:
+                    new_rank = aitken(x1, x2, new_rank)
         page_rank = new_rank
 
-    # Return
-    return page_rank
+
+def aitken(x0, x1, x2):
+    """
+    Return the Aitken delta-squared extrapolation of three successive
+    iterates, component by component, renormalized to sum to 1.
+    Components that cannot be extrapolated keep their value in `x2`.
+    """
+    extrapolated = []
+    for a, b, c in zip(x0, x1, x2):
+        h = c - 2 * b + a
+        x = c - (c - b) ** 2 / h if abs(h) > 1e-15 else c
+        extrapolated.append(x if x > 0 else c)
+    total = sum(extrapolated)
+    return [x / total for x in extrapolated]
+
+
+def l1_change(new, old):
+    """
+    Return the L1 norm of `new` - `old`.
+    """
+    return sum(abs(a - b) for a, b in zip(new, old))
+
+
+def max_change(new, old):
+    """
+    Return the L-infinity norm of `new` - `old`.
+    """
+    return max(abs(a - b) for a, b in zip(new, old))
+
+
+METHODS = ("jacobi", "gauss-seidel", "aitken")
+NORMS = {"l1": l1_change, "inf": max_change}
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file